@@ -3,3 +3,5 @@
 # See README.rst file on addons root folder for license details
 
 from . import models
+from . import wizard
+from . import cli
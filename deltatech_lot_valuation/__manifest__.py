@@ -4,15 +4,22 @@
 {
     "name": "Lot valuation",
     "summary": "Lot valuation",
-    "version": "16.0.1.1.0",
+    "version": "16.0.1.6.0",
     "author": "Terrabit, Dorin Hongu",
     "website": "https://www.terrabit.ro",
     "category": "Inventory/Inventory",
     "depends": ["stock_account"],
     "license": "LGPL-3",
     "data": [
+        "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "views/stock_production_lot.xml",
         "views/stock_quant_view.xml",
+        "wizard/stock_lot_import_view.xml",
+        "views/stock_picking_view.xml",
+        "views/stock_lot_valuation_snapshot_view.xml",
+        "wizard/stock_lot_valuation_report_view.xml",
+        "wizard/stock_lot_revaluation_view.xml",
     ],
     "images": ["static/description/main_screenshot.png"],
     "development_status": "Beta",
@@ -0,0 +1,4 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from . import lot_location
@@ -0,0 +1,27 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+import argparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+
+
+class LotLocation(Command):
+    """Refresh the stored location of all the lots, by chunks"""
+
+    name = "lot_location"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(prog=f"{Path(sys.argv[0]).name} {self.name}", description=self.__doc__)
+        parser.add_argument("-c", "--config", help="Odoo configuration file")
+        parser.add_argument("-d", "--database", required=True, help="Database name")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Number of lots per transaction")
+        args = parser.parse_args(cmdargs)
+
+        odoo.tools.config.parse_config(["-d", args.database] + (["-c", args.config] if args.config else []))
+        with odoo.registry(args.database).cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            env["stock.lot"]._refresh_location(chunk_size=args.chunk_size, commit=True)
@@ -0,0 +1,32 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+import logging
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50000
+
+
+def migrate(cr, version):
+    """Link the existing valuation layers to the lots of their stock move lines."""
+    if not version:
+        return
+    cr.execute("SELECT min(id), max(id) FROM stock_valuation_layer")
+    min_id, max_id = cr.fetchone()
+    if not min_id:
+        return
+    for start in range(min_id, max_id + 1, CHUNK_SIZE):
+        cr.execute(
+            """
+            INSERT INTO stock_valuation_layer_lot_rel (layer_id, lot_id)
+            SELECT DISTINCT svl.id, sml.lot_id
+              FROM stock_valuation_layer svl
+              JOIN stock_move_line sml ON sml.move_id = svl.stock_move_id
+             WHERE sml.lot_id IS NOT NULL
+               AND svl.id >= %s AND svl.id < %s
+            ON CONFLICT DO NOTHING
+            """,
+            (start, start + CHUNK_SIZE),
+        )
+        _logger.info("Valuation layers %s-%s: %s lot links added", start, start + CHUNK_SIZE - 1, cr.rowcount)
@@ -0,0 +1,45 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Open the valuation ledger of the lots in stock with their current quantity and value."""
+    if not version:
+        return
+    cr.execute(
+        """
+        WITH stock AS (
+            SELECT q.lot_id, sum(q.quantity) AS qty
+              FROM stock_quant q
+              JOIN stock_location l ON l.id = q.location_id
+             WHERE q.lot_id IS NOT NULL AND l.usage = 'internal'
+             GROUP BY q.lot_id
+            HAVING sum(q.quantity) > 0
+        ), opening AS (
+            SELECT lot.id AS lot_id, lot.product_id, lot.company_id, stock.qty,
+                   CASE WHEN pt.tracking = 'serial' THEN coalesce(lot.inventory_value, 0)
+                        ELSE coalesce(lot.unit_price, 0) * stock.qty END AS value
+              FROM stock
+              JOIN stock_lot lot ON lot.id = stock.lot_id
+              JOIN product_product pp ON pp.id = lot.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+        ), ledger AS (
+            INSERT INTO stock_lot_valuation (lot_id, product_id, company_id, date, type, quantity, value,
+                                             remaining_qty, remaining_value,
+                                             create_uid, create_date, write_uid, write_date)
+            SELECT lot_id, product_id, company_id, now() at time zone 'UTC', 'in', qty, value, qty, value,
+                   1, now() at time zone 'UTC', 1, now() at time zone 'UTC'
+              FROM opening
+            RETURNING lot_id, remaining_qty, remaining_value
+        )
+        UPDATE stock_lot lot
+           SET remaining_qty = ledger.remaining_qty, remaining_value = ledger.remaining_value
+          FROM ledger
+         WHERE lot.id = ledger.lot_id
+        """
+    )
+    _logger.info("Valuation ledger opened for %s lots", cr.rowcount)
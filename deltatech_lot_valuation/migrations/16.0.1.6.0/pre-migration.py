@@ -0,0 +1,24 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+import logging
+
+from odoo.addons.deltatech_lot_valuation.models.stock_quant import LOT_VALUE_UPDATE_QUERY
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Create and fill the stored lot value of the quants with SQL, before the ORM computes them one by one."""
+    if not version:
+        return
+    cr.execute(
+        """
+        ALTER TABLE stock_quant
+            ADD COLUMN IF NOT EXISTS lot_value numeric,
+            ADD COLUMN IF NOT EXISTS lot_unit_cost numeric
+        """
+    )
+    cr.execute("UPDATE stock_quant SET lot_value = 0, lot_unit_cost = 0 WHERE lot_id IS NULL")
+    cr.execute(LOT_VALUE_UPDATE_QUERY.format(where="TRUE"))
+    _logger.info("Lot value of %s quants initialized", cr.rowcount)
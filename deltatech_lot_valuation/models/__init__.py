@@ -4,7 +4,10 @@
 
 from . import stock_valuation_layer
 from . import stock_move
+from . import stock_move_line
 from . import stock_quant
 from . import product
 from . import stock_production_lot
 from . import stock_picking
+from . import stock_lot_valuation
+from . import stock_lot_valuation_snapshot
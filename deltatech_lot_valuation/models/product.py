@@ -10,38 +10,25 @@ class ProductProduct(models.Model):
     _inherit = "product.product"
 
     def _prepare_out_svl_vals(self, quantity, company):
-
-        if "lot_ids" in self.env.context:
-            vals = {
+        # map built once per batch in StockMove._action_done: {product_id: (lots, amount, qty)}
+        lot_valuation = self.env.context.get("lot_valuation") or {}
+        if self.id in lot_valuation:
+            # standard cost: the moves are valued at the lot cost, the lot layers of the FIFO and AVCO
+            # products are consumed and valued by StockMove._create_out_svl
+            _lots, amount, qty = lot_valuation[self.id]
+            unit_cost = amount / (qty or 1)
+            return {
                 "product_id": self.id,
-                "value": -1 * quantity * self.standard_price,
-                "unit_cost": self.standard_price,
+                "unit_cost": round(unit_cost, 2),
+                "value": round(-1 * unit_cost * quantity, 2),
                 "quantity": -1 * quantity,
             }
-            lots = self.env.context["lot_ids"].filtered(lambda l: l.product_id.id == self.id)
-            move_lines = self.env.context["move_lines"].filtered(lambda l: l.product_id.id == self.id)
-            if lots:
-                qty = 0
-                amount = 0
-
-                for line in move_lines:
-                    amount += line.lot_id.unit_price * line.qty_done
-                    qty += line.qty_done
-
-                unit_cost = amount / (qty or 1)
-                try:
-                    self.with_context(lot_ids=lots)._run_fifo(abs(quantity), company)
-                except ZeroDivisionError:
-                    pass
-                vals["unit_cost"] = round(unit_cost, 2)
-                vals["value"] = round(-1 * unit_cost * quantity, 2)
-                return vals
-
-        vals = super(ProductProduct, self)._prepare_out_svl_vals(company)
+
+        vals = super(ProductProduct, self)._prepare_out_svl_vals(quantity, company)
         return vals
 
     def _run_fifo(self, quantity, company):
-        return super(ProductProduct, self)._run_fifo(company)
+        return super(ProductProduct, self)._run_fifo(quantity, company)
 
     def _run_fifo_vacuum(self, company=None):
         return super(ProductProduct, self)._run_fifo_vacuum(company)
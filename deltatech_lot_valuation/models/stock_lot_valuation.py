@@ -0,0 +1,71 @@
+# ©  2008-2022 Deltatech
+#              Dorin Hongu <dhongu(@)gmail(.)com
+# See README.rst file on addons root folder for license details
+
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models, tools
+
+
+class StockLotValuation(models.Model):
+    _name = "stock.lot.valuation"
+    _description = "Lot Valuation Ledger"
+    _order = "lot_id, id"
+
+    lot_id = fields.Many2one("stock.lot", required=True, index=True, ondelete="cascade", readonly=True)
+    product_id = fields.Many2one(related="lot_id.product_id", store=True)
+    company_id = fields.Many2one(related="lot_id.company_id", store=True)
+    date = fields.Datetime(required=True, default=fields.Datetime.now, index=True, readonly=True)
+    type = fields.Selection(
+        [("in", "Receipt"), ("out", "Consumption"), ("revaluation", "Revaluation")], required=True, readonly=True
+    )
+    move_line_id = fields.Many2one("stock.move.line", readonly=True, ondelete="set null")
+    quantity = fields.Float(readonly=True)
+    value = fields.Float(readonly=True)
+    remaining_qty = fields.Float("Remaining Quantity", readonly=True)
+    remaining_value = fields.Float("Remaining Value", readonly=True)
+
+    @api.model
+    def _record(self, entries):
+        """
+        Append entries to the ledger and update the running totals of their lots.
+
+        :param entries: list of dicts with lot_id, type, quantity (signed) and optionally value, move_line_id, date;
+                        an entry without value is valued at the average cost of the lot
+        :return: the created ledger lines
+        """
+        if not entries:
+            return self.browse()
+        lots = self.env["stock.lot"].browse({entry["lot_id"] for entry in entries})
+        balance = {lot.id: [lot.remaining_qty, lot.remaining_value, lot.unit_price] for lot in lots}
+        vals_list = []
+        for entry in entries:
+            lot_balance = balance[entry["lot_id"]]
+            remaining_qty, remaining_value, unit_price = lot_balance
+            value = entry.get("value")
+            if value is None:
+                unit_cost = remaining_value / remaining_qty if remaining_qty > 0 else unit_price
+                value = entry["quantity"] * unit_cost
+            lot_balance[0] = remaining_qty + entry["quantity"]
+            lot_balance[1] = remaining_value + value
+            vals_list.append(dict(entry, value=value, remaining_qty=lot_balance[0], remaining_value=lot_balance[1]))
+
+        lines = self.create(vals_list)
+
+        lots.flush_recordset(["remaining_qty", "remaining_value"])
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE stock_lot AS lot
+               SET remaining_qty = data.qty, remaining_value = data.value
+              FROM (VALUES %s) AS data(id, qty, value)
+             WHERE lot.id = data.id
+            """,
+            [(lot_id, float(qty), float(value)) for lot_id, (qty, value, _price) in balance.items()],
+        )
+        lots.invalidate_recordset(["remaining_qty", "remaining_value"])
+        return lines
+
+    def init(self):
+        # ledger entries of a company in a date range, for the valuation at date
+        tools.create_index(self._cr, "stock_lot_valuation_company_date_index", self._table, ["company_id", "date"])
@@ -0,0 +1,143 @@
+# ©  2008-2022 Deltatech
+#              Dorin Hongu <dhongu(@)gmail(.)com
+# See README.rst file on addons root folder for license details
+
+import logging
+from datetime import datetime, time, timedelta
+
+import pytz
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class StockLotValuationSnapshot(models.Model):
+    _name = "stock.lot.valuation.snapshot"
+    _description = "Lot Valuation Snapshot"
+    _order = "date desc, lot_id, location_id"
+
+    date = fields.Date(required=True, index=True, readonly=True)
+    company_id = fields.Many2one("res.company", required=True, index=True, readonly=True)
+    lot_id = fields.Many2one("stock.lot", required=True, index=True, ondelete="cascade", readonly=True)
+    product_id = fields.Many2one("product.product", readonly=True)
+    location_id = fields.Many2one("stock.location", readonly=True)
+    quantity = fields.Float(readonly=True)
+    value = fields.Float(readonly=True)
+
+    @api.model
+    def _get_day_end(self, date, company):
+        """End of the date in the timezone of the company, as naive UTC datetime."""
+        tz = pytz.timezone(company.partner_id.tz or self.env.user.tz or "UTC")
+        day_end = tz.localize(datetime.combine(date + timedelta(days=1), time.min))
+        return day_end.astimezone(pytz.utc).replace(tzinfo=None)
+
+    @api.model
+    def _get_ledger_opening(self, company):
+        """Date of the first entry of the valuation ledger of the company, None if the ledger is empty."""
+        self.env["stock.lot.valuation"].flush_model(["company_id", "date"])
+        self.env.cr.execute("SELECT min(date) FROM stock_lot_valuation WHERE company_id = %s", (company.id,))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_valuation_query(self, date, company):
+        """
+        Query of the quantity and value by lot and location at the end of the date: the last snapshot before
+        the date is rolled forward with the move lines and the valuation ledger entries created since.
+
+        Without snapshot, the valuation starts from the opening of the ledger: the quantities are rolled from the
+        first move, the values from the opening entries, so dates before the opening cannot be valued.
+
+        :return: (query, params), the query selects lot_id, product_id, location_id, company_id, quantity, value
+        """
+        self.env.flush_all()
+        stop = self._get_day_end(date, company)
+        opening = self._get_ledger_opening(company)
+        if not opening or stop <= opening:
+            raise UserError(
+                _("The lot valuation of %(company)s starts on %(opening)s, it cannot be computed at %(date)s.")
+                % {"company": company.name, "opening": opening or _("the first lot move"), "date": date}
+            )
+        snapshot = self.search([("company_id", "=", company.id), ("date", "<=", date)], order="date desc", limit=1)
+        params = {
+            "company_id": company.id,
+            "snapshot": snapshot.date or None,
+            "start": self._get_day_end(snapshot.date, company) if snapshot else datetime(1900, 1, 1),
+            "stop": stop,
+        }
+        query = """
+            WITH moves AS (
+                SELECT lot_id, location_id, quantity
+                  FROM stock_lot_valuation_snapshot
+                 WHERE company_id = %(company_id)s AND date = %(snapshot)s
+                 UNION ALL
+                SELECT lot_id, location_dest_id, qty_done
+                  FROM stock_move_line
+                 WHERE state = 'done' AND lot_id IS NOT NULL AND company_id = %(company_id)s
+                   AND date >= %(start)s AND date < %(stop)s
+                 UNION ALL
+                SELECT lot_id, location_id, -qty_done
+                  FROM stock_move_line
+                 WHERE state = 'done' AND lot_id IS NOT NULL AND company_id = %(company_id)s
+                   AND date >= %(start)s AND date < %(stop)s
+            ), stock AS (
+                SELECT moves.lot_id, moves.location_id, sum(moves.quantity) AS quantity
+                  FROM moves
+                  JOIN stock_location loc ON loc.id = moves.location_id AND loc.usage = 'internal'
+                 GROUP BY moves.lot_id, moves.location_id
+                HAVING sum(moves.quantity) != 0
+            ), lot_stock AS (
+                SELECT lot_id, sum(quantity) AS quantity
+                  FROM stock
+                 GROUP BY lot_id
+            ), lot_value AS (
+                SELECT lot_id, sum(value) AS value
+                  FROM (SELECT lot_id, value
+                          FROM stock_lot_valuation_snapshot
+                         WHERE company_id = %(company_id)s AND date = %(snapshot)s
+                         UNION ALL
+                        SELECT lot_id, value
+                          FROM stock_lot_valuation
+                         WHERE company_id = %(company_id)s AND date >= %(start)s AND date < %(stop)s) AS ledger
+                 GROUP BY lot_id
+            )
+            SELECT stock.lot_id, lot.product_id, stock.location_id, %(company_id)s, stock.quantity,
+                   CASE WHEN lot_stock.quantity != 0
+                        THEN coalesce(lot_value.value, 0) * stock.quantity / lot_stock.quantity
+                        ELSE 0 END
+              FROM stock
+              JOIN lot_stock ON lot_stock.lot_id = stock.lot_id
+              JOIN stock_lot lot ON lot.id = stock.lot_id
+              LEFT JOIN lot_value ON lot_value.lot_id = stock.lot_id
+        """
+        return query, params
+
+    @api.model
+    def _take_snapshot(self, date, company):
+        """Store the lot valuation of the company at the end of the date."""
+        query, params = self._get_valuation_query(date, company)
+        self.env.cr.execute(
+            """
+            INSERT INTO stock_lot_valuation_snapshot (lot_id, product_id, location_id, company_id, quantity, value,
+                                                      date, create_uid, create_date, write_uid, write_date)
+            SELECT valuation.*, %(date)s, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM ({query}) AS valuation
+            """.format(
+                query=query
+            ),
+            dict(params, date=date, uid=self.env.uid),
+        )
+        _logger.info("Lot valuation snapshot of %s at %s: %s lines", company.name, date, self.env.cr.rowcount)
+        self.invalidate_model()
+
+    @api.model
+    def _cron_take_snapshot(self):
+        """Take the snapshot at the end of the previous month, for the companies that do not have it yet."""
+        period_end = fields.Date.context_today(self).replace(day=1) - timedelta(days=1)
+        for company in self.env["res.company"].search([]):
+            opening = self._get_ledger_opening(company)
+            if not opening or self._get_day_end(period_end, company) <= opening:
+                continue
+            if not self.search_count([("company_id", "=", company.id), ("date", "=", period_end)]):
+                self._take_snapshot(period_end, company)
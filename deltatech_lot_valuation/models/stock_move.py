@@ -4,33 +4,149 @@
 
 
 from odoo import models
+from odoo.tools import float_compare, float_is_zero, frozendict
 
 
 class StockMove(models.Model):
     _inherit = "stock.move"
 
-    # def _create_out_svl(self, forced_quantity=None):
-    #     lots = self.env["stock.lot"]
-    #     for move in self:
-    #         move = move.with_company(move.company_id)
-    #         valued_move_lines = move._get_out_move_lines()
-    #         for line in valued_move_lines:
-    #             lots |= line.lot_id
-    #     if lots:
-    #         return super(StockMove, self.with_context(lot_ids=lots))._create_out_svl(forced_quantity)
-    #     else:
-    #         return super(StockMove, self)._create_out_svl(forced_quantity)
+    def _get_lot_valuation_map(self):
+        """
+        Group the move lines of the batch by product, in a single pass.
 
-    def _action_done(self, cancel_backorder=False):
-        lots = self.env["stock.lot"]
-        move_lines = self.env["stock.move.line"]
+        :return: frozendict {product_id: (lots, amount, qty)} with the lots of the product, the sum of
+                 lot unit price * done quantity and the sum of done quantity; products without lots are skipped
+        """
+        move_lines = self.move_line_ids
+        # read the unit price of all the lots of the batch with one query
+        move_lines.lot_id.mapped("unit_price")
+        grouped = {}
+        for line in move_lines:
+            values = grouped.setdefault(line.product_id.id, [[], 0.0, 0.0])
+            if line.lot_id:
+                values[0].append(line.lot_id.id)
+            values[1] += line.lot_id.unit_price * line.qty_done
+            values[2] += line.qty_done
+        Lot = self.env["stock.lot"]
+        return frozendict(
+            {
+                product_id: (Lot.browse(list(dict.fromkeys(lot_ids))), amount, qty)
+                for product_id, (lot_ids, amount, qty) in grouped.items()
+                if lot_ids
+            }
+        )
+
+    def _prepare_lot_valuation_entries(self):
+        """Ledger entries for the lots entering or leaving the internal locations."""
+        entries = []
+        for line in self.move_line_ids:
+            if not line.lot_id or not line.qty_done:
+                continue
+            source_internal = line.location_id.usage == "internal"
+            dest_internal = line.location_dest_id.usage == "internal"
+            if source_internal == dest_internal:
+                continue
+            entry = {"lot_id": line.lot_id.id, "move_line_id": line.id, "date": line.date}
+            if dest_internal:
+                entry.update(type="in", quantity=line.qty_done)
+                if line.location_id.usage == "supplier":
+                    price_unit = line.lot_id.input_price if line.lot_valued else line.move_id.price_unit
+                    entry["value"] = price_unit * line.qty_done
+            else:
+                entry.update(type="out", quantity=-line.qty_done)
+            entries.append(entry)
+        return entries
+
+    def _prepare_lot_fifo_requests(self, forced_quantity=None):
+        """
+        Outgoing quantity of each lot of the moves valued by lot, for StockValuationLayer._run_lot_fifo.
+
+        :return: dict {move: [(product_id, company_id, lot_id, quantity), ...]}
+        """
+        lot_valuation = self.env.context.get("lot_valuation") or {}
+        requests = {}
         for move in self:
-            for line in move.move_line_ids:
-                lots |= line.lot_id
-                move_lines |= line
-        if lots:
-            return super(StockMove, self.with_context(lot_ids=lots, move_lines=move_lines))._action_done(
-                cancel_backorder
+            product = move.product_id
+            if product.id not in lot_valuation or product.cost_method not in ("average", "fifo"):
+                continue
+            remaining = forced_quantity
+            for line in move._get_out_move_lines():
+                if not line.lot_id:
+                    continue
+                quantity = line.product_uom_id._compute_quantity(line.qty_done, product.uom_id)
+                if forced_quantity is not None:
+                    quantity = min(quantity, remaining)
+                    remaining -= quantity
+                if quantity > 0:
+                    requests.setdefault(move, []).append((product.id, move.company_id.id, line.lot_id.id, quantity))
+        return requests
+
+    def _prepare_lot_out_svl_vals(self, quantity, value, forced_quantity=None):
+        """Outgoing layer of the move valued with the lot layers it consumed, the quantity the lot layers did
+        not cover is valued at the product cost and left negative for the FIFO vacuum, as stock_account does."""
+        self.ensure_one()
+        product = self.product_id.with_company(self.company_id)
+        valued_quantity = forced_quantity or sum(
+            line.product_uom_id._compute_quantity(line.qty_done, product.uom_id)
+            for line in self._get_out_move_lines()
+        )
+        missing = valued_quantity - quantity
+        if float_compare(missing, 0.0, precision_rounding=product.uom_id.rounding) > 0:
+            value += missing * product.standard_price
+        else:
+            missing = 0.0
+        vals = {
+            "product_id": product.id,
+            "quantity": -valued_quantity,
+            "value": -self.company_id.currency_id.round(value),
+            "unit_cost": value / valued_quantity,
+        }
+        if missing:
+            vals["remaining_qty"] = -missing
+        vals.update(self._prepare_common_svl_vals())
+        if forced_quantity:
+            vals["description"] = "Correction of %s (modification of past move)" % (self.picking_id.name or self.name)
+        return vals
+
+    def _create_out_svl(self, forced_quantity=None):
+        # consume the lot layers of the whole batch at once and value each move with what it consumed
+        requests = self._prepare_lot_fifo_requests(forced_quantity)
+        if not requests:
+            return super(StockMove, self)._create_out_svl(forced_quantity)
+        taken = iter(
+            self.env["stock.valuation.layer"].sudo()._run_lot_fifo(
+                [request for move_requests in requests.values() for request in move_requests]
             )
+        )
+        svl_vals_list = []
+        lot_moves = self.browse()
+        for move, move_requests in requests.items():
+            quantity = value = 0.0
+            for _request in move_requests:
+                qty_taken, value_taken = next(taken)
+                quantity += qty_taken
+                value += value_taken
+            if float_is_zero(quantity, precision_rounding=move.product_id.uom_id.rounding):
+                # no lot layer to consume: standard FIFO, with its negative stock handling
+                continue
+            lot_moves |= move
+            move = move.with_company(move.company_id)
+            svl_vals_list.append(move._prepare_lot_out_svl_vals(quantity, value, forced_quantity))
+        layers = self.env["stock.valuation.layer"].sudo().create(svl_vals_list)
+
+        without_layers = self.browse([move.id for move in requests]) - lot_moves
+        if without_layers:
+            layers |= super(StockMove, without_layers.with_context(lot_valuation=None))._create_out_svl(forced_quantity)
+        others = self - lot_moves - without_layers
+        if others:
+            layers |= super(StockMove, others)._create_out_svl(forced_quantity)
+        return layers
+
+    def _action_done(self, cancel_backorder=False):
+        lot_valuation = self._get_lot_valuation_map()
+        if lot_valuation:
+            moves = super(StockMove, self.with_context(lot_valuation=lot_valuation))._action_done(cancel_backorder)
+            self.env["stock.lot.valuation"].sudo()._record(moves._prepare_lot_valuation_entries())
         else:
-            return super(StockMove, self)._action_done(cancel_backorder)
+            moves = super(StockMove, self)._action_done(cancel_backorder)
+        return moves
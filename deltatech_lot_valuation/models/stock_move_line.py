@@ -0,0 +1,22 @@
+# ©  2008-2022 Deltatech
+#              Dorin Hongu <dhongu(@)gmail(.)com
+# See README.rst file on addons root folder for license details
+
+from odoo import fields, models, tools
+
+
+class StockMoveLine(models.Model):
+    _inherit = "stock.move.line"
+
+    # set by StockPicking.import_lots: the lot already has its reception values
+    lot_valued = fields.Boolean(readonly=True, copy=False)
+
+    def init(self):
+        # roll forward of the lot valuation at date: done lot lines of a company in a date range
+        tools.create_index(
+            self._cr,
+            "stock_move_line_lot_valuation_date_index",
+            self._table,
+            ["company_id", "date"],
+            where="state = 'done' AND lot_id IS NOT NULL",
+        )
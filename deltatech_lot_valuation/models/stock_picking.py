@@ -2,25 +2,217 @@
 #              Dan Stoica <danila(@)terrabit(.)ro
 # See README.rst file on addons root folder for license details
 
-from odoo import models
+from collections import defaultdict
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import float_compare, split_every
 
 
 class StockPicking(models.Model):
     _inherit = "stock.picking"
 
+    lot_update_state = fields.Selection(
+        [("pending", "Pending"), ("done", "Done")], string="Lot Update", readonly=True, copy=False
+    )
+    lot_update_count = fields.Integer(readonly=True, copy=False)
+    lot_update_progress = fields.Float("Lot Update Progress", readonly=True, copy=False)
+
+    def _get_reception_lot_lines(self):
+        return self.move_line_ids_without_package.filtered(
+            lambda ml: ml.lot_id
+            and not ml.lot_valued
+            and ml.location_id.usage == "supplier"
+            and ml.location_dest_id.usage in ["internal"]
+        ).sorted("id")
+
+    def _update_lot_values(self, move_lines):
+        """Write the reception info on the lots, with one write for each distinct set of values."""
+        lots_by_values = defaultdict(list)
+        for move_line in move_lines:
+            values = {
+                "inventory_value": move_line.move_id.price_unit * move_line.qty_done,
+                "input_price": move_line.move_id.price_unit,
+                "unit_price": move_line.move_id.price_unit,
+                "input_date": move_line.picking_id.scheduled_date,
+            }
+            if move_line.product_id.tracking == "serial":
+                values["location_id"] = move_line.location_dest_id.id
+            lots_by_values[tuple(sorted(values.items()))].append(move_line.lot_id.id)
+        for values, lot_ids in lots_by_values.items():
+            self.env["stock.lot"].browse(lot_ids).write(dict(values))
+
+    def import_lots(self, lots, batch_size=5000):
+        """
+        Create the lots/serial numbers of a receipt with their reception values already set,
+        and their move lines, by batches. The lots are then left as they are by button_validate.
+
+        :param lots: list of dicts with name, product (internal reference) or product_id, and optionally
+                     quantity (default 1) and price_unit, which must be the price of a move of the product
+        :return: the created lots
+        """
+        self.ensure_one()
+        if self.picking_type_code != "incoming" or self.state in ("done", "cancel"):
+            raise UserError(_("Lots can only be imported on a receipt that is not done."))
+        moves = self.move_ids.filtered(lambda m: m.state not in ("done", "cancel") and m.has_tracking != "none")
+        # moves of each product, with the quantity still to receive
+        moves_by_product = defaultdict(list)
+        for move in moves.sorted("id"):
+            moves_by_product[move.product_id.id].append([move, move.product_uom_qty - move.quantity_done])
+        product_by_code = {product.default_code: product.id for product in moves.product_id if product.default_code}
+        default_product_id = moves.product_id.id if len(moves.product_id) == 1 else None
+
+        rows = []
+        unknown = []
+        for index, row in enumerate(lots, start=1):
+            name = (row.get("name") or "").strip()
+            if not name:
+                raise UserError(_("Row %s: the lot name is missing.") % index)
+            if row.get("product_id"):
+                product_id = int(row["product_id"])
+            elif row.get("product"):
+                product_id = product_by_code.get(row["product"])
+            else:
+                product_id = default_product_id
+            if product_id not in moves_by_product:
+                unknown.append(name)
+                continue
+            row_label = _("Row %(row)s (%(name)s)") % {"row": index, "name": name}
+            try:
+                quantity = float(row.get("quantity") or 1.0)
+                price_unit = row.get("price_unit")
+                price_unit = float(price_unit) if price_unit not in (None, "") else None
+            except (TypeError, ValueError) as e:
+                raise UserError(_("%s: the quantity and the price must be numbers.") % row_label) from e
+            move = moves_by_product[product_id][0][0]
+            if quantity <= 0:
+                raise UserError(_("%s: the quantity must be positive.") % row_label)
+            if move.has_tracking == "serial" and float_compare(
+                quantity, 1.0, precision_rounding=move.product_uom.rounding
+            ):
+                raise UserError(_("%s: the quantity of a serial number must be 1.") % row_label)
+            # the receipt is valued at the price of its move, a lot at another price would make the lot valuation
+            # differ from the stock valuation and the accounting
+            if price_unit is not None and not self._get_import_price_moves(moves_by_product[product_id], price_unit):
+                raise UserError(_("%s: the price %s differs from the price of the receipt.") % (row_label, price_unit))
+            rows.append((product_id, name, quantity, price_unit))
+        if unknown:
+            raise UserError(_("No product to receive for the lots: %s") % ", ".join(unknown[:20]))
+        self._check_import_lot_names(rows)
+
+        # the lines without lot are replaced by the imported ones
+        moves.move_line_ids.filtered(lambda ml: not ml.lot_id and not ml.qty_done).unlink()
+        Lot = self.env["stock.lot"]
+        lots_created = Lot
+        for batch in split_every(batch_size, rows):
+            lot_vals_list = []
+            line_moves = []
+            for product_id, name, quantity, price_unit in batch:
+                candidates = moves_by_product[product_id]
+                if price_unit is not None:
+                    candidates = self._get_import_price_moves(candidates, price_unit)
+                move = self._take_import_move(candidates, quantity)
+                price_unit = move.price_unit
+                lot_vals_list.append(
+                    {
+                        "name": name,
+                        "product_id": product_id,
+                        "company_id": self.company_id.id,
+                        "inventory_value": price_unit * quantity,
+                        "input_price": price_unit,
+                        "unit_price": price_unit,
+                        "input_date": self.scheduled_date,
+                    }
+                )
+                line_moves.append((move, quantity))
+            batch_lots = Lot.create(lot_vals_list)
+            self.env["stock.move.line"].create(
+                [
+                    {
+                        "move_id": move.id,
+                        "picking_id": self.id,
+                        "product_id": move.product_id.id,
+                        "product_uom_id": move.product_uom.id,
+                        "location_id": move.location_id.id,
+                        "location_dest_id": move.location_dest_id.id,
+                        "company_id": self.company_id.id,
+                        "lot_id": lot.id,
+                        "qty_done": quantity,
+                        "lot_valued": True,
+                    }
+                    for lot, (move, quantity) in zip(batch_lots, line_moves)
+                ]
+            )
+            lots_created |= batch_lots
+        return lots_created
+
+    def _get_import_price_moves(self, candidates, price_unit):
+        """Candidate moves at the price of an imported lot."""
+        currency = self.company_id.currency_id
+        return [
+            candidate for candidate in candidates if not currency.compare_amounts(price_unit, candidate[0].price_unit)
+        ]
+
+    @api.model
+    def _take_import_move(self, candidates, quantity):
+        """Move receiving an imported lot: the first one with enough quantity left, else the last one."""
+        for candidate in candidates:
+            if candidate[1] >= quantity:
+                break
+        candidate[1] -= quantity
+        return candidate[0]
+
+    def _check_import_lot_names(self, rows):
+        """Reject the lots already existing for the product, with one query by batch of names."""
+        keys = [(product_id, name) for product_id, name, _qty, _price in rows]
+        if len(set(keys)) != len(keys):
+            raise UserError(_("The same lot is listed more than once for a product."))
+        self.env["stock.lot"].flush_model(["name", "product_id", "company_id"])
+        existing = []
+        for batch in split_every(10000, keys):
+            self.env.cr.execute(
+                """
+                SELECT name FROM stock_lot
+                 WHERE company_id = %s AND (product_id, name) IN %s
+                """,
+                [self.company_id.id, tuple(batch)],
+            )
+            existing += [row[0] for row in self.env.cr.fetchall()]
+        if existing:
+            raise UserError(_("Lots already existing: %s") % ", ".join(existing[:20]))
+
     def button_validate(self):
         res = super(StockPicking, self).button_validate()
         # update lot info for reception
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        threshold = int(get_param("deltatech_lot_valuation.lot_update_async_threshold", 0))
+        deferred = self.env["stock.picking"]
         for picking in self:
-            for move_line in picking.move_line_ids_without_package:
-                if move_line.lot_id:
-                    values = {}
-                    if move_line.location_id.usage == "supplier" and move_line.location_dest_id.usage in ["internal"]:
-                        values["inventory_value"] = move_line.move_id.price_unit * move_line.qty_done
-                        values["input_price"] = move_line.move_id.price_unit
-                        values["unit_price"] = move_line.move_id.price_unit
-                        values["input_date"] = move_line.picking_id.scheduled_date
-                        if move_line.product_id.tracking == "serial":
-                            values["location_id"] = move_line.location_dest_id.id
-                        move_line.lot_id.write(values)
+            move_lines = picking._get_reception_lot_lines()
+            if threshold and len(move_lines) > threshold:
+                deferred |= picking
+            else:
+                picking._update_lot_values(move_lines)
+        if deferred:
+            deferred.write({"lot_update_state": "pending", "lot_update_count": 0, "lot_update_progress": 0.0})
+            self.env.ref("deltatech_lot_valuation.ir_cron_update_lot_values")._trigger()
         return res
+
+    @api.model
+    def _cron_update_lot_values(self, batch_size=1000):
+        """Update the lots of the large receptions deferred by button_validate, committing each batch."""
+        for picking in self.search([("lot_update_state", "=", "pending")]):
+            move_lines = picking._get_reception_lot_lines()
+            while picking.lot_update_state == "pending":
+                start = picking.lot_update_count
+                picking._update_lot_values(move_lines[start : start + batch_size])
+                done = min(start + batch_size, len(move_lines))
+                picking.write(
+                    {
+                        "lot_update_count": done,
+                        "lot_update_progress": 100.0 * done / (len(move_lines) or 1),
+                        "lot_update_state": "done" if done >= len(move_lines) else "pending",
+                    }
+                )
+                if not self.env.registry.in_test_mode():
+                    self.env.cr.commit()  # pylint: disable=invalid-commit
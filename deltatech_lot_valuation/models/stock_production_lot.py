@@ -2,7 +2,16 @@
 #              Dan Stoica <danila(@)terrabit(.)ro
 # See README.rst file on addons root folder for license details
 
-from odoo import api, fields, models
+import logging
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+from odoo import _, api, fields, models
+from odoo.exceptions import AccessError
+from odoo.tools import float_is_zero, split_every
+
+_logger = logging.getLogger(__name__)
 
 
 class ProductionLot(models.Model):
@@ -13,12 +22,177 @@ class ProductionLot(models.Model):
     input_price = fields.Float("Input Price")
     input_date = fields.Date(string="Input date")
     location_id = fields.Many2one("stock.location", compute="_compute_location", store=True)
+    # running totals maintained by stock.lot.valuation
+    remaining_qty = fields.Float("Remaining Quantity", readonly=True, copy=False)
+    remaining_value = fields.Float("Remaining Value", readonly=True, copy=False)
+    valuation_line_ids = fields.One2many("stock.lot.valuation", "lot_id", string="Valuation Ledger", readonly=True)
 
     @api.depends("quant_ids")
     def _compute_location(self):
+        # one aggregate query over the positive quants of all the lots
+        lots = self.filtered(lambda lot: isinstance(lot.id, int))
+        locations = {}
+        if lots:
+            self.env["stock.quant"].flush_model(["lot_id", "location_id", "quantity"])
+            self.env.cr.execute(
+                """
+                SELECT lot_id, CASE WHEN count(*) = 1 THEN min(location_id) END
+                  FROM stock_quant
+                 WHERE lot_id IN %s AND quantity > 0
+                 GROUP BY lot_id
+                """,
+                [tuple(lots.ids)],
+            )
+            locations = dict(self.env.cr.fetchall())
+        for lot in self:
+            # multiple quants, can be in different locations
+            lot.location_id = locations.get(lot.id) or False
+
+    @api.model
+    def _refresh_location(self, chunk_size=10000, commit=False):
+        """Recompute the stored location of all the lots with SQL, by chunks of lot ids."""
+        self.env["stock.quant"].flush_model(["lot_id", "location_id", "quantity"])
+        self.env.cr.execute("SELECT min(id), max(id) FROM stock_lot")
+        min_id, max_id = self.env.cr.fetchone()
+        if not min_id:
+            return
+        for start in range(min_id, max_id + 1, chunk_size):
+            self.env.cr.execute(
+                """
+                UPDATE stock_lot lot
+                   SET location_id = stock.location_id
+                  FROM (SELECT l.id, CASE WHEN count(q.id) = 1 THEN min(q.location_id) END AS location_id
+                          FROM stock_lot l
+                          LEFT JOIN stock_quant q ON q.lot_id = l.id AND q.quantity > 0
+                         WHERE l.id >= %s AND l.id < %s
+                         GROUP BY l.id) AS stock
+                 WHERE lot.id = stock.id AND lot.location_id IS DISTINCT FROM stock.location_id
+                """,
+                (start, start + chunk_size),
+            )
+            _logger.info("Lots %s-%s: %s locations updated", start, start + chunk_size - 1, self.env.cr.rowcount)
+            if commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+        self.invalidate_model(["location_id"])
+
+    def write(self, vals):
+        res = super(ProductionLot, self).write(vals)
+        if "unit_price" in vals:
+            self._record_revaluation()
+        return res
+
+    def _record_revaluation(self):
+        """Revalue the remaining quantity of the lots at their unit price."""
+        entries = []
         for lot in self:
-            quants = lot.quant_ids.filtered(lambda x: x.quantity > 0)
-            if len(quants) > 1:  # multiple quants, can be in different locations
-                lot.location_id = False
-            else:
-                lot.location_id = quants.location_id
+            if float_is_zero(lot.remaining_qty, precision_rounding=lot.product_id.uom_id.rounding):
+                continue
+            delta = lot.remaining_qty * lot.unit_price - lot.remaining_value
+            if not lot.company_id.currency_id.is_zero(delta):
+                entries.append({"lot_id": lot.id, "type": "revaluation", "quantity": 0.0, "value": delta})
+        return self.env["stock.lot.valuation"].sudo()._record(entries)
+
+    @api.model
+    def revalue(self, unit_prices, batch_size=1000):
+        """
+        Set new unit prices on lots, in set-based batches, with the matching valuation adjustment layers.
+
+        :param unit_prices: dict {lot_id: unit_price} or list of (lot_id, unit_price) pairs
+        :return: the adjustment valuation layers
+        """
+        # the prices are written with SQL and the layers and entries created as superuser, check the rights first
+        self.check_access_rights("write")
+        if not self.env.su and not self.env.user.has_group("stock.group_stock_manager"):
+            raise AccessError(_("Only the inventory managers can revalue lots."))
+        if isinstance(unit_prices, dict):
+            unit_prices = unit_prices.items()
+        # ids are strings when the dict comes over RPC
+        unit_prices = [(int(lot_id), float(unit_price)) for lot_id, unit_price in unit_prices]
+        lots = self.browse([lot_id for lot_id, _price in unit_prices])
+        lots.check_access_rule("write")
+        for company in lots.company_id:
+            products = lots.filtered(lambda lot, company=company: lot.company_id == company).product_id
+            if any(product.valuation == "real_time" for product in products.with_company(company)):
+                # the revaluation posts journal entries
+                self.env["account.move"].check_access_rights("create")
+                break
+        layers = self.env["stock.valuation.layer"]
+        for batch in split_every(batch_size, unit_prices):
+            layers |= self._revalue_batch(dict(batch))
+        return layers
+
+    @api.model
+    def _revalue_batch(self, unit_prices):
+        lots = self.browse(list(unit_prices))
+        lots.flush_recordset(["unit_price", "inventory_value"])
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE stock_lot AS lot
+               SET unit_price = data.price,
+                   inventory_value = CASE WHEN pt.tracking = 'serial' THEN data.price ELSE lot.inventory_value END
+              FROM (VALUES %s) AS data(id, price), product_product pp, product_template pt
+             WHERE lot.id = data.id AND pp.id = lot.product_id AND pt.id = pp.product_tmpl_id
+            """,
+            list(unit_prices.items()),
+        )
+        lots.invalidate_recordset(["unit_price", "inventory_value"])
+        self.env["stock.quant"]._refresh_lot_values(lots.ids)
+        ledger_lines = lots._record_revaluation()
+        self._spread_revaluation(ledger_lines)
+
+        # one adjustment layer by product and company
+        values = defaultdict(float)
+        lot_ids = defaultdict(list)
+        for line in ledger_lines:
+            key = (line.product_id.id, line.company_id.id)
+            values[key] += line.value
+            lot_ids[key].append(line.lot_id.id)
+        layers = self.env["stock.valuation.layer"].sudo().create(
+            [
+                {
+                    "product_id": product_id,
+                    "company_id": company_id,
+                    "quantity": 0.0,
+                    "unit_cost": 0.0,
+                    "value": value,
+                    "description": _("Lot revaluation"),
+                    "lot_ids": [(6, 0, lot_ids[(product_id, company_id)])],
+                }
+                for (product_id, company_id), value in values.items()
+            ]
+        )
+        layers._create_lot_revaluation_account_moves()
+        self.env["stock.quant"].invalidate_model(["value", "price_unit"])
+        return layers
+
+    @api.model
+    def _spread_revaluation(self, ledger_lines):
+        """Add the revaluation of each lot to the remaining value of its open layers, in proportion to their
+        remaining quantity, so the lot FIFO values the next deliveries at the new price."""
+        deltas = [(line.lot_id.id, line.value) for line in ledger_lines]
+        if not deltas:
+            return
+        Layer = self.env["stock.valuation.layer"]
+        Layer.flush_model(["product_id", "company_id", "remaining_qty", "remaining_value", "lot_ids"])
+        execute_values(
+            self.env.cr._obj,
+            """
+            UPDATE stock_valuation_layer AS svl
+               SET remaining_value = coalesce(svl.remaining_value, 0) + spread.value
+              FROM (SELECT share.id, sum(share.value) AS value
+                      FROM (SELECT layer.id,
+                                   data.delta::numeric * layer.remaining_qty
+                                   / sum(layer.remaining_qty) OVER (PARTITION BY data.lot_id) AS value
+                              FROM (VALUES %s) AS data(lot_id, delta)
+                              JOIN stock_lot lot ON lot.id = data.lot_id
+                              JOIN stock_valuation_layer_lot_rel rel ON rel.lot_id = data.lot_id
+                              JOIN stock_valuation_layer layer
+                                ON layer.id = rel.layer_id AND layer.remaining_qty > 0
+                               AND layer.product_id = lot.product_id AND layer.company_id = lot.company_id) share
+                     GROUP BY share.id) spread
+             WHERE svl.id = spread.id
+            """,
+            deltas,
+        )
+        Layer.invalidate_model(["remaining_value"])
@@ -4,6 +4,29 @@
 
 
 from odoo import api, fields, models
+from odoo.tools import float_is_zero
+
+# stored lot value of the quants of the lots matching the condition, rounded to the company currency as the ORM does;
+# shared by StockQuant._refresh_lot_values and the 16.0.1.6.0 migration
+LOT_VALUE_UPDATE_QUERY = """
+    UPDATE stock_quant q
+       SET lot_value = round(data.value / data.rounding) * data.rounding,
+           lot_unit_cost = round(CASE WHEN q.quantity != 0 THEN data.value / q.quantity ELSE data.unit_price END
+                                 / data.rounding) * data.rounding
+      FROM (SELECT q.id,
+                   cur.rounding,
+                   coalesce(lot.unit_price, 0)::numeric AS unit_price,
+                   CASE WHEN pt.tracking = 'serial' THEN coalesce(lot.inventory_value, 0)::numeric
+                        ELSE coalesce(lot.unit_price, 0)::numeric * q.quantity END AS value
+              FROM stock_quant q
+              JOIN stock_lot lot ON lot.id = q.lot_id
+              JOIN product_product pp ON pp.id = lot.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+              JOIN res_company company ON company.id = q.company_id
+              JOIN res_currency cur ON cur.id = company.currency_id
+             WHERE {where}) AS data
+     WHERE q.id = data.id
+"""
 
 
 class StockQuant(models.Model):
@@ -11,45 +34,106 @@ class StockQuant(models.Model):
 
     price_unit = fields.Monetary(compute="_compute_value")
 
-    @api.depends("company_id", "location_id", "owner_id", "product_id", "quantity", "lot_id")
+    # lot-derived value, stored so the quant lists can sort, filter and group by it in SQL;
+    # quants without lot are valued from the layers by _compute_value and have 0 here
+    lot_value = fields.Monetary(
+        "Lot Value",
+        compute="_compute_lot_value",
+        store=True,
+        index=True,
+        help="Value of the lot/serial number in stock, only set on the quants with a lot/serial number.",
+    )
+    lot_unit_cost = fields.Monetary(
+        "Lot Unit Cost",
+        compute="_compute_lot_value",
+        store=True,
+        index=True,
+        help="Unit cost of the lot/serial number, only set on the quants with a lot/serial number.",
+    )
+
+    @api.depends("lot_id.unit_price", "lot_id.inventory_value", "product_id.tracking", "quantity")
+    def _compute_lot_value(self):
+        for quant in self:
+            lot = quant.lot_id
+            if not lot:
+                quant.lot_value = 0.0
+                quant.lot_unit_cost = 0.0
+                continue
+            if quant.product_id.tracking == "serial":
+                value = lot.inventory_value
+            else:
+                value = lot.unit_price * quant.quantity
+            currency = quant.company_id.currency_id
+            quant.lot_value = currency.round(value)
+            quant.lot_unit_cost = currency.round(value / quant.quantity if quant.quantity else lot.unit_price)
+
+    @api.model
+    def _refresh_lot_values(self, lot_ids):
+        """Same as _compute_lot_value with one UPDATE, for the lots whose prices are written with SQL."""
+        if not lot_ids:
+            return
+        self.flush_model(["lot_id", "quantity", "company_id", "lot_value", "lot_unit_cost"])
+        self.env.cr.execute(LOT_VALUE_UPDATE_QUERY.format(where="q.lot_id IN %s"), [tuple(lot_ids)])
+        self.invalidate_model(["lot_value", "lot_unit_cost"])
+
+    def _read_svl_values(self):
+        """
+        Read the valuation layer totals of the quant products with one grouped query,
+        as product.product _compute_value_svl does for a single company.
+
+        :return: dict {(product_id, company_id): (quantity, value)}
+        """
+        product_ids = tuple(product_id for product_id in self.product_id._ids if isinstance(product_id, int))
+        company_ids = tuple(company_id for company_id in self.company_id._ids if isinstance(company_id, int))
+        if not product_ids or not company_ids:
+            return {}
+        self.env["stock.valuation.layer"].flush_model(["product_id", "company_id", "quantity", "value", "create_date"])
+        query = """
+            SELECT product_id, company_id, sum(quantity), sum(value)
+              FROM stock_valuation_layer
+             WHERE product_id IN %s AND company_id IN %s
+        """
+        params = [product_ids, company_ids]
+        if self.env.context.get("to_date"):
+            query += " AND create_date <= %s"
+            params.append(fields.Datetime.to_datetime(self.env.context["to_date"]))
+        self.env.cr.execute(query + " GROUP BY product_id, company_id", params)
+        return {(row[0], row[1]): row[2:] for row in self.env.cr.fetchall()}
+
+    @api.depends("company_id", "location_id", "owner_id", "product_id", "quantity", "lot_id", "lot_value")
     def _compute_value(self):
-        quants = self.env["stock.quant"]
+        svl_values = self._read_svl_values()
         for quant in self:
-            value = 0
-            quant.price_unit = quant.product_id.standard_price
+            currency = quant.company_id.currency_id
+            quant.currency_id = currency
             if quant.lot_id:
-                if quant.product_id.tracking == "serial":
-                    value = quant.lot_id.inventory_value
-                else:
-                    value = quant.lot_id.unit_price * quant.quantity
-
-                quant.currency_id = quant.company_id.currency_id
-                quant.value = value
-                if quant.quantity:
-                    quant.price_unit = value / quant.quantity
-            else:
-                quants += quant
-            quant.currency_id = quant.company_id.currency_id
-        res = super(StockQuant, quants)._compute_value()
-        for quant in quants:
-            if quant.quantity:
-                quant.price_unit = quant.value / quant.quantity
-        return res
-
-    # @api.depends("company_id", "location_id", "owner_id", "product_id", "quantity", "lot_id")
-    # def _compute_value(self):
-    #     quants = self.env["stock.quant"]
-    #     for quant in self:
-    #     if quant.product_id.tracking == "lot" and quant.lot_id.inventory_value == 0:
-    #         quant.lot_id.inventory_value = quant.price_unit * quant.quantity
-    #     if quant.lot_id:
-    #         # super(StockQuant, quant.with_context(lot_ids=quant.lot_id))._compute_value()
-    #         if quant.lot_id.product_qty:
-    #             unit_price = quant.lot_id.inventory_value / quant.lot_id.product_qty
-    #             quant.value = unit_price * quant.quantity
-    #         else:
-    #             quant.value = quant.lot_id.inventory_value
-    #     else:
-    #         quants += quant
-    # return super(StockQuant, quants)._compute_value()
-    #     quant.value = quant.price_unit *  quant.quantity
+                # read from the quant row
+                quant.value = quant.lot_value
+                quant.price_unit = quant.lot_unit_cost
+                continue
+            value = quant._get_svl_value(svl_values)
+            quant.value = value
+            quant.price_unit = value / quant.quantity if quant.quantity else quant.product_id.standard_price
+
+    def _get_svl_value(self, svl_values):
+        """Value of an untracked quant, same as stock_account computes it, from the preloaded layer totals
+        (average of the layers for FIFO and AVCO, standard price for standard cost)."""
+        self.ensure_one()
+        rounding = self.product_id.uom_id.rounding
+        if (
+            not self.location_id
+            or not self.product_id
+            or not self.location_id._should_be_valued()
+            or self._should_exclude_for_valuation()
+            or float_is_zero(self.quantity, precision_rounding=rounding)
+        ):
+            return 0.0
+        product = self.product_id.with_company(self.company_id)
+        if product.cost_method == "standard":
+            # standard cost: the quant is valued at the cost of the product, as stock_account does
+            return self.quantity * product.standard_price
+        quantity_svl, value_svl = svl_values.get((self.product_id.id, self.company_id.id), (0.0, 0.0))
+        if float_is_zero(quantity_svl, precision_rounding=rounding):
+            return 0.0
+        value_svl = self.company_id.currency_id.round(value_svl)
+        return self.quantity * value_svl / quantity_svl
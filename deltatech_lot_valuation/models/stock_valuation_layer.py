@@ -3,39 +3,191 @@
 # See README.rst file on addons root folder for license details
 
 
-from odoo import api, models
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import float_compare, float_is_zero
 
 
 class StockValuationLayer(models.Model):
     _inherit = "stock.valuation.layer"
 
-    # lot_id = fields.Many2one("stock.lot", "Lot/Serial Number")
+    lot_ids = fields.Many2many(
+        "stock.lot",
+        "stock_valuation_layer_lot_rel",
+        "layer_id",
+        "lot_id",
+        string="Lots/Serial Numbers",
+        readonly=True,
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        move_ids = [vals["stock_move_id"] for vals in vals_list if vals.get("stock_move_id") and "lot_ids" not in vals]
+        if move_ids:
+            moves = self.env["stock.move"].browse(move_ids)
+            # read the lots of all the moves with one query
+            lots_by_move = {move.id: move.move_line_ids.lot_id.ids for move in moves}
+            for vals in vals_list:
+                lot_ids = lots_by_move.get(vals.get("stock_move_id"))
+                if lot_ids and "lot_ids" not in vals:
+                    vals["lot_ids"] = [(6, 0, lot_ids)]
+        return super(StockValuationLayer, self).create(vals_list)
+
+    def _create_lot_revaluation_account_moves(self):
+        """Post the journal entries of the lot revaluation layers of automatically valued products,
+        as stock_account does for a change of the standard price."""
+        move_vals_list = []
+        for layer in self:
+            product = layer.product_id.with_company(layer.company_id)
+            if product.valuation != "real_time" or layer.currency_id.is_zero(layer.value):
+                continue
+            accounts = product.product_tmpl_id.get_product_accounts()
+            if not accounts.get("expense"):
+                raise UserError(_("You must set a counterpart account on your product category."))
+            if not accounts.get("stock_valuation"):
+                raise UserError(
+                    _(
+                        "You don't have any stock valuation account defined on your product category. "
+                        "You must define one before processing this operation."
+                    )
+                )
+            if layer.value < 0:
+                debit_account, credit_account = accounts["expense"], accounts["stock_valuation"]
+            else:
+                debit_account, credit_account = accounts["stock_valuation"], accounts["expense"]
+            name = _("Lot revaluation - %s") % product.display_name
+            move_vals_list.append(
+                {
+                    "journal_id": accounts["stock_journal"].id,
+                    "company_id": layer.company_id.id,
+                    "ref": product.default_code,
+                    "stock_valuation_layer_ids": [(6, 0, layer.ids)],
+                    "move_type": "entry",
+                    "line_ids": [
+                        (
+                            0,
+                            0,
+                            {
+                                "name": name,
+                                "account_id": debit_account.id,
+                                "debit": abs(layer.value),
+                                "credit": 0,
+                                "product_id": product.id,
+                            },
+                        ),
+                        (
+                            0,
+                            0,
+                            {
+                                "name": name,
+                                "account_id": credit_account.id,
+                                "debit": 0,
+                                "credit": abs(layer.value),
+                                "product_id": product.id,
+                            },
+                        ),
+                    ],
+                }
+            )
+        account_moves = self.env["account.move"].sudo().create(move_vals_list)
+        if account_moves:
+            account_moves._post()
+        return account_moves
+
+    def init(self):
+        # candidates of the lot FIFO: layers with remaining quantity, in FIFO order
+        self.env.cr.execute(
+            """
+            CREATE INDEX IF NOT EXISTS stock_valuation_layer_fifo_candidate_index
+                ON stock_valuation_layer (product_id, company_id, create_date, id)
+             WHERE remaining_qty > 0
+            """
+        )
 
     @api.model
-    def _search(self, args, offset=0, limit=None, order=None, count=False, access_rights_uid=None):
-        if self.env.context.get("lot_ids", False):
-            lots = self.env.context["lot_ids"]
-            domain = [("move_line_ids.lot_id", "in", lots.ids)]
-            moves = self.env["stock.move"].search(domain)
-            if moves:
-                args += [("stock_move_id", "in", moves.ids)]
-        return super(StockValuationLayer, self)._search(args, offset, limit, order, count, access_rights_uid)
-
-    # def search(self, args, offset=0, limit=None, order=None, count=False):
-    #     if self.env.context.get("lot_ids", False):
-    #         lots = self.env.context["lot_ids"]
-    #         domain = [("move_line_ids.lot_id", "in", lots.ids)]
-    #         moves = self.env["stock.move"].search(domain)
-    #         if moves:
-    #             args += [("stock_move_id", "in", moves.ids)]
-    #
-    #     return super(StockValuationLayer, self).search(args, offset, limit=limit, order=order, count=count)
-
-    def read_group(self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
-        if self.env.context.get("lot_ids", False):
-            lots = self.env.context["lot_ids"]
-            local_domain = [("move_line_ids.lot_id", "in", lots.ids)]
-            moves = self.env["stock.move"].search(local_domain)
-            if moves:
-                domain += [("stock_move_id", "in", moves.ids)]
-        return super(StockValuationLayer, self).read_group(domain, fields, groupby, offset, limit, orderby, lazy)
+    def _get_lot_fifo_candidates(self, product_ids, company_ids, lot_ids):
+        """
+        Read the layers of the lots that still have a remaining quantity, in FIFO order, with one query.
+
+        :return: dict {(product_id, company_id): [[layer_id, lot_ids, remaining_qty, remaining_value], ...]}
+        """
+        self.flush_model(["product_id", "company_id", "remaining_qty", "remaining_value", "lot_ids"])
+        self.env.cr.execute(
+            """
+            SELECT svl.id, svl.product_id, svl.company_id, array_agg(rel.lot_id),
+                   svl.remaining_qty, coalesce(svl.remaining_value, 0)
+              FROM stock_valuation_layer svl
+              JOIN stock_valuation_layer_lot_rel rel ON rel.layer_id = svl.id
+             WHERE svl.remaining_qty > 0
+               AND svl.product_id IN %s
+               AND svl.company_id IN %s
+               AND rel.lot_id IN %s
+             GROUP BY svl.id
+             ORDER BY svl.create_date, svl.id
+            """,
+            [tuple(product_ids), tuple(company_ids), tuple(lot_ids)],
+        )
+        candidates = defaultdict(list)
+        for layer_id, product_id, company_id, layer_lot_ids, remaining_qty, remaining_value in self.env.cr.fetchall():
+            candidates[(product_id, company_id)].append([layer_id, set(layer_lot_ids), remaining_qty, remaining_value])
+        return candidates
+
+    @api.model
+    def _run_lot_fifo(self, requests):
+        """
+        Consume the layers of the lots for the outgoing quantities of a whole move batch, in FIFO order.
+
+        The candidates are read once, consumed in memory and their remaining quantity and value
+        are written back with a single UPDATE.
+
+        :param requests: list of (product_id, company_id, lot_id, quantity), quantity in the product UoM
+        :return: list of (quantity taken, value taken), in the order of the requests; the quantity taken is
+                 lower than the requested one when the lot layers do not cover it
+        """
+        if not requests:
+            return []
+        product_ids, company_ids, lot_ids, _quantities = zip(*requests)
+        candidates = self._get_lot_fifo_candidates(set(product_ids), set(company_ids), set(lot_ids))
+        products = self.env["product.product"].browse(set(product_ids))
+        rounding = {product.id: product.uom_id.rounding for product in products}
+        updated = {}
+        taken = []
+        for product_id, company_id, lot_id, quantity in requests:
+            qty_to_take = quantity
+            value_taken = 0.0
+            for candidate in candidates.get((product_id, company_id), []):
+                _layer_id, layer_lot_ids, remaining_qty, remaining_value = candidate
+                if lot_id not in layer_lot_ids or float_is_zero(remaining_qty, precision_rounding=rounding[product_id]):
+                    continue
+                qty = min(qty_to_take, remaining_qty)
+                if float_compare(qty, remaining_qty, precision_rounding=rounding[product_id]) == 0:
+                    # the whole layer is taken, with its exact remaining value
+                    qty, value = remaining_qty, remaining_value
+                else:
+                    value = remaining_value * qty / remaining_qty
+                candidate[2] = remaining_qty - qty
+                candidate[3] = remaining_value - value
+                updated[candidate[0]] = candidate
+                qty_to_take -= qty
+                value_taken += value
+                if float_is_zero(qty_to_take, precision_rounding=rounding[product_id]):
+                    break
+            taken.append((quantity - qty_to_take, value_taken))
+
+        if updated:
+            execute_values(
+                self.env.cr._obj,
+                """
+                UPDATE stock_valuation_layer AS svl
+                   SET remaining_qty = data.qty, remaining_value = data.value
+                  FROM (VALUES %s) AS data(id, qty, value)
+                 WHERE svl.id = data.id
+                """,
+                [(layer_id, float(qty), float(value)) for layer_id, _lots, qty, value in updated.values()],
+            )
+            self.browse(list(updated)).invalidate_recordset(["remaining_qty", "remaining_value"])
+        return taken
@@ -0,0 +1,10 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from . import test_benchmark
+from . import test_quant_value
+from . import test_lot_ledger
+from . import test_lot_snapshot
+from . import test_lot_revaluation
+from . import test_lot_fifo
+from . import test_lot_import
@@ -0,0 +1,104 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from odoo.tests import TransactionCase
+
+
+class LotValuationCommon(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.company = cls.env.company
+        cls.warehouse = cls.env["stock.warehouse"].search([("company_id", "=", cls.company.id)], limit=1)
+        cls.stock_location = cls.warehouse.lot_stock_id
+        cls.supplier_location = cls.env.ref("stock.stock_location_suppliers")
+        cls.customer_location = cls.env.ref("stock.stock_location_customers")
+        cls.category = cls.env["product.category"].create({"name": "Lot valuation", "property_cost_method": "fifo"})
+        cls.product_lot = cls._create_product("Lot product", "lot")
+        cls.product_serial = cls._create_product("Serial product", "serial")
+        cls.product_untracked = cls._create_product("Untracked product", "none")
+
+    @classmethod
+    def _create_product(cls, name, tracking, category=None):
+        return cls.env["product.product"].create(
+            {
+                "name": name,
+                "type": "product",
+                "tracking": tracking,
+                "categ_id": (category or cls.category).id,
+                "standard_price": 10.0,
+            }
+        )
+
+    def _create_lot(self, product, name):
+        return self.env["stock.lot"].create({"name": name, "product_id": product.id, "company_id": self.company.id})
+
+    def _create_picking(self, picking_type, location, location_dest, product, quantity, price_unit=0.0):
+        picking = self.env["stock.picking"].create(
+            {
+                "picking_type_id": picking_type.id,
+                "location_id": location.id,
+                "location_dest_id": location_dest.id,
+                "move_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": product.name,
+                            "product_id": product.id,
+                            "product_uom": product.uom_id.id,
+                            "product_uom_qty": quantity,
+                            "price_unit": price_unit,
+                            "location_id": location.id,
+                            "location_dest_id": location_dest.id,
+                        },
+                    )
+                ],
+            }
+        )
+        picking.action_confirm()
+        return picking
+
+    def _transfer(self, picking_type, location, location_dest, product, lines, price_unit=0.0):
+        """Create and validate a transfer of the product, lines: list of (lot or False, done quantity)"""
+        picking = self._create_picking(
+            picking_type, location, location_dest, product, sum(qty for _lot, qty in lines), price_unit
+        )
+        move = picking.move_ids
+        # replace the reserved lines by the done ones
+        move.move_line_ids.unlink()
+        self.env["stock.move.line"].create(
+            [
+                {
+                    "move_id": move.id,
+                    "picking_id": picking.id,
+                    "product_id": product.id,
+                    "product_uom_id": product.uom_id.id,
+                    "lot_id": lot.id if lot else False,
+                    "qty_done": qty,
+                    "location_id": location.id,
+                    "location_dest_id": location_dest.id,
+                }
+                for lot, qty in lines
+            ]
+        )
+        picking.with_context(skip_immediate=True, skip_backorder=True).button_validate()
+        return picking
+
+    def _receive(self, product, lines, price_unit):
+        return self._transfer(
+            self.warehouse.in_type_id, self.supplier_location, self.stock_location, product, lines, price_unit
+        )
+
+    def _deliver(self, product, lines):
+        return self._transfer(self.warehouse.out_type_id, self.stock_location, self.customer_location, product, lines)
+
+    def _get_quant(self, product, lot=None):
+        return self.env["stock.quant"].search(
+            [
+                ("product_id", "=", product.id),
+                ("location_id", "=", self.stock_location.id),
+                ("lot_id", "=", lot.id if lot else False),
+            ]
+        )
@@ -0,0 +1,244 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+"""
+Benchmarks of the lot valuation flows.
+
+They are not part of the standard test run, start them with::
+
+    odoo-bin -d <db> -i deltatech_lot_valuation --test-tags lot_valuation_benchmark --stop-after-init
+
+The scale is read from the environment:
+
+- LOT_BENCH_PRODUCTS: number of products of each tracking type (default 5)
+- LOT_BENCH_LOTS: number of lots/serial numbers by product (default 50)
+- LOT_BENCH_PICKINGS: number of receptions and deliveries (default 2)
+- LOT_BENCH_OUTPUT: JSON file receiving the results (default lot_valuation_benchmark.json)
+- LOT_BENCH_CEILING_<FLOW>: "base,per_line" query ceiling overriding the default of a flow
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+# query ceilings by flow: base + per_line * number of move lines / quants
+# the per line part covers the quant update and the move line write that stock does for each line,
+# everything the module adds on top of it is grouped and must stay in the base
+QUERY_CEILINGS = {
+    "button_validate": (120, 8),
+    "action_done": (120, 8),
+    "quant_compute_value": (6, 0),
+    "lot_fifo": (4, 0),
+    "import_lots": (40, 1),
+    "import_lots_validate": (120, 8),
+}
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+@tagged("-standard", "lot_valuation_benchmark")
+class TestLotValuationBenchmark(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product_count = _env_int("LOT_BENCH_PRODUCTS", 5)
+        cls.lot_count = _env_int("LOT_BENCH_LOTS", 50)
+        cls.picking_count = _env_int("LOT_BENCH_PICKINGS", 2)
+        cls.results = {}
+
+        cls.warehouse = cls.env["stock.warehouse"].search([("company_id", "=", cls.env.company.id)], limit=1)
+        cls.stock_location = cls.warehouse.lot_stock_id
+        cls.supplier_location = cls.env.ref("stock.stock_location_suppliers")
+        cls.customer_location = cls.env.ref("stock.stock_location_customers")
+
+        category = cls.env["product.category"].create(
+            {"name": "Lot valuation benchmark", "property_cost_method": "fifo"}
+        )
+        cls.products = cls.env["product.product"].create(
+            [
+                {
+                    "name": f"Benchmark {tracking} {index}",
+                    "type": "product",
+                    "tracking": tracking,
+                    "categ_id": category.id,
+                    "standard_price": 10.0,
+                }
+                for tracking in ("serial", "lot")
+                for index in range(cls.product_count)
+            ]
+        )
+        cls.lots = cls.env["stock.lot"].create(
+            [
+                {"name": f"BENCH-{product.id}-{index}", "product_id": product.id, "company_id": cls.env.company.id}
+                for product in cls.products
+                for index in range(cls.lot_count * cls.picking_count)
+            ]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        output = os.environ.get("LOT_BENCH_OUTPUT", "lot_valuation_benchmark.json")
+        with open(output, "w") as file:
+            json.dump(
+                {
+                    "scale": {
+                        "products": cls.product_count,
+                        "lots": cls.lot_count,
+                        "pickings": cls.picking_count,
+                    },
+                    "results": cls.results,
+                },
+                file,
+                indent=2,
+            )
+        _logger.info("Lot valuation benchmark results written to %s", output)
+        super().tearDownClass()
+
+    @contextmanager
+    def measure(self, flow, size):
+        """Record wall time and query count of the block and check the query ceiling of the flow."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        elapsed = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+        base, per_line = QUERY_CEILINGS[flow]
+        if os.environ.get(f"LOT_BENCH_CEILING_{flow.upper()}"):
+            base, per_line = map(int, os.environ[f"LOT_BENCH_CEILING_{flow.upper()}"].split(","))
+        ceiling = base + per_line * size
+        self.results[flow] = {"size": size, "seconds": round(elapsed, 4), "queries": queries, "ceiling": ceiling}
+        _logger.info("%s: %s lines in %.3fs, %s queries (ceiling %s)", flow, size, elapsed, queries, ceiling)
+        self.assertLessEqual(queries, ceiling, f"{flow} exceeded its query ceiling")
+
+    def _create_pickings(self, picking_type, location, location_dest, lot_slice):
+        pickings = self.env["stock.picking"]
+        for index in range(self.picking_count):
+            picking = self.env["stock.picking"].create(
+                {
+                    "picking_type_id": picking_type.id,
+                    "location_id": location.id,
+                    "location_dest_id": location_dest.id,
+                    "move_ids": [
+                        (
+                            0,
+                            0,
+                            {
+                                "name": product.name,
+                                "product_id": product.id,
+                                "product_uom": product.uom_id.id,
+                                "product_uom_qty": self.lot_count * lot_slice,
+                                "price_unit": 10.0 + index,
+                                "location_id": location.id,
+                                "location_dest_id": location_dest.id,
+                            },
+                        )
+                        for product in self.products
+                    ],
+                }
+            )
+            picking.action_confirm()
+            line_vals = []
+            for move in picking.move_ids:
+                lots = self.lots.filtered(lambda lot, product=move.product_id: lot.product_id == product)
+                for lot in lots[index * self.lot_count : (index + 1) * self.lot_count]:
+                    line_vals.append(
+                        {
+                            "move_id": move.id,
+                            "picking_id": picking.id,
+                            "product_id": move.product_id.id,
+                            "product_uom_id": move.product_uom.id,
+                            "lot_id": lot.id,
+                            "qty_done": lot_slice,
+                            "location_id": location.id,
+                            "location_dest_id": location_dest.id,
+                        }
+                    )
+            self.env["stock.move.line"].create(line_vals)
+            pickings |= picking
+        return pickings
+
+    def _receive(self):
+        receptions = self._create_pickings(
+            self.warehouse.in_type_id, self.supplier_location, self.stock_location, lot_slice=1
+        )
+        receptions.with_context(skip_immediate=True, skip_backorder=True).button_validate()
+        return receptions
+
+    def test_button_validate(self):
+        receptions = self._create_pickings(
+            self.warehouse.in_type_id, self.supplier_location, self.stock_location, lot_slice=1
+        )
+        with self.measure("button_validate", len(receptions.move_line_ids)):
+            receptions.with_context(skip_immediate=True, skip_backorder=True).button_validate()
+        self.assertTrue(all(picking.state == "done" for picking in receptions))
+
+    def test_import_lots(self):
+        receipt = self.env["stock.picking"].create(
+            {
+                "picking_type_id": self.warehouse.in_type_id.id,
+                "location_id": self.supplier_location.id,
+                "location_dest_id": self.stock_location.id,
+                "move_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": product.name,
+                            "product_id": product.id,
+                            "product_uom": product.uom_id.id,
+                            "product_uom_qty": self.lot_count,
+                            "price_unit": 10.0,
+                            "location_id": self.supplier_location.id,
+                            "location_dest_id": self.stock_location.id,
+                        },
+                    )
+                    for product in self.products
+                ],
+            }
+        )
+        receipt.action_confirm()
+        lots = [
+            {"name": f"ASN-{product.id}-{index}", "product_id": product.id, "price_unit": 10.0}
+            for product in self.products
+            for index in range(self.lot_count)
+        ]
+        with self.measure("import_lots", len(lots)):
+            receipt.import_lots(lots)
+        with self.measure("import_lots_validate", len(lots)):
+            receipt.with_context(skip_immediate=True, skip_backorder=True).button_validate()
+        self.assertEqual(receipt.state, "done")
+        self.assertTrue(all(lot.unit_price == 10.0 for lot in receipt.move_line_ids.lot_id))
+
+    def test_action_done(self):
+        self._receive()
+        deliveries = self._create_pickings(
+            self.warehouse.out_type_id, self.stock_location, self.customer_location, lot_slice=1
+        )
+        with self.measure("action_done", len(deliveries.move_line_ids)):
+            deliveries.move_ids._action_done()
+        self.assertTrue(all(move.state == "done" for move in deliveries.move_ids))
+
+    def test_quant_compute_value(self):
+        self._receive()
+        quants = self.env["stock.quant"].search([("product_id", "in", self.products.ids)])
+        with self.measure("quant_compute_value", len(quants)):
+            quants._compute_value()
+        self.assertTrue(all(quant.value for quant in quants))
+
+    def test_lot_fifo(self):
+        self._receive()
+        requests = [(lot.product_id.id, self.env.company.id, lot.id, 1.0) for lot in self.lots]
+        with self.measure("lot_fifo", len(requests)):
+            taken = self.env["stock.valuation.layer"]._run_lot_fifo(requests)
+        self.assertTrue(all(quantity for quantity, _value in taken))
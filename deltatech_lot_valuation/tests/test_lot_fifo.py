@@ -0,0 +1,45 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from odoo.tests import tagged
+
+from .common import LotValuationCommon
+
+
+@tagged("post_install", "-at_install")
+class TestLotFifo(LotValuationCommon):
+    def test_out_layer_valued_from_lot_layers(self):
+        lot_1 = self._create_lot(self.product_lot, "FIFO-1")
+        lot_2 = self._create_lot(self.product_lot, "FIFO-2")
+        self._receive(self.product_lot, [(lot_1, 5.0)], 10.0)
+        receipt = self._receive(self.product_lot, [(lot_2, 5.0)], 20.0)
+
+        # the product FIFO would take the first receipt, the lot FIFO takes the layer of the lot
+        delivery = self._deliver(self.product_lot, [(lot_2, 2.0)])
+        out_layer = delivery.move_ids.stock_valuation_layer_ids
+        self.assertAlmostEqual(out_layer.quantity, -2.0)
+        self.assertAlmostEqual(out_layer.value, -40.0)
+        in_layer = receipt.move_ids.stock_valuation_layer_ids
+        self.assertAlmostEqual(in_layer.remaining_qty, 3.0)
+        self.assertAlmostEqual(in_layer.remaining_value, 60.0)
+
+    def test_whole_layer_taken_at_its_value(self):
+        lot = self._create_lot(self.product_lot, "FIFO-3")
+        receipt = self._receive(self.product_lot, [(lot, 3.0)], 10.0 / 3)
+        in_layer = receipt.move_ids.stock_valuation_layer_ids
+        delivery = self._deliver(self.product_lot, [(lot, 3.0)])
+        self.assertAlmostEqual(in_layer.remaining_qty, 0.0)
+        self.assertAlmostEqual(in_layer.remaining_value, 0.0)
+        self.assertAlmostEqual(delivery.move_ids.stock_valuation_layer_ids.value, -in_layer.value)
+
+    def test_engine_reports_quantity_taken(self):
+        lot = self._create_lot(self.product_lot, "FIFO-4")
+        self._receive(self.product_lot, [(lot, 2.0)], 10.0)
+        taken = self.env["stock.valuation.layer"]._run_lot_fifo(
+            [(self.product_lot.id, self.company.id, lot.id, 1.0), (self.product_lot.id, self.company.id, lot.id, 5.0)]
+        )
+        self.assertAlmostEqual(taken[0][0], 1.0)
+        self.assertAlmostEqual(taken[0][1], 10.0)
+        # only the rest of the layer is left for the second request
+        self.assertAlmostEqual(taken[1][0], 1.0)
+        self.assertAlmostEqual(taken[1][1], 10.0)
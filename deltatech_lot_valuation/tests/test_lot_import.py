@@ -0,0 +1,35 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import LotValuationCommon
+
+
+@tagged("post_install", "-at_install")
+class TestLotImport(LotValuationCommon):
+    def _create_receipt(self, product, quantity):
+        return self._create_picking(
+            self.warehouse.in_type_id, self.supplier_location, self.stock_location, product, quantity, 10.0
+        )
+
+    def test_import_lots(self):
+        receipt = self._create_receipt(self.product_serial, 2.0)
+        lots = receipt.import_lots([{"name": "IMP-1"}, {"name": "IMP-2", "price_unit": "10"}])
+        self.assertEqual(len(lots), 2)
+        self.assertTrue(all(lot.unit_price == 10.0 for lot in lots))
+        receipt.with_context(skip_immediate=True, skip_backorder=True).button_validate()
+        self.assertAlmostEqual(sum(lots.mapped("remaining_value")), 20.0)
+        self.assertAlmostEqual(receipt.move_ids.stock_valuation_layer_ids.value, 20.0)
+
+    def test_import_rejects_bad_rows(self):
+        receipt = self._create_receipt(self.product_serial, 2.0)
+        for row in (
+            {"name": ""},
+            {"name": "IMP-3", "quantity": "2"},
+            {"name": "IMP-4", "quantity": "x"},
+            {"name": "IMP-5", "price_unit": "12.5"},
+        ):
+            with self.assertRaises(UserError):
+                receipt.import_lots([row])
@@ -0,0 +1,28 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from odoo.tests import tagged
+
+from .common import LotValuationCommon
+
+
+@tagged("post_install", "-at_install")
+class TestLotValuationLedger(LotValuationCommon):
+    def test_ledger_running_totals(self):
+        lot = self._create_lot(self.product_lot, "LEDGER-1")
+        self._receive(self.product_lot, [(lot, 10.0)], 5.0)
+        self.assertEqual(lot.valuation_line_ids.mapped("type"), ["in"])
+        self.assertAlmostEqual(lot.remaining_qty, 10.0)
+        self.assertAlmostEqual(lot.remaining_value, 50.0)
+
+        self._deliver(self.product_lot, [(lot, 4.0)])
+        out = lot.valuation_line_ids.filtered(lambda line: line.type == "out")
+        self.assertAlmostEqual(out.quantity, -4.0)
+        self.assertAlmostEqual(out.value, -20.0)
+        self.assertAlmostEqual(lot.remaining_qty, 6.0)
+        self.assertAlmostEqual(lot.remaining_value, 30.0)
+
+        lot.unit_price = 6.0
+        revaluation = lot.valuation_line_ids.filtered(lambda line: line.type == "revaluation")
+        self.assertAlmostEqual(revaluation.value, 6.0)
+        self.assertAlmostEqual(lot.remaining_value, 36.0)
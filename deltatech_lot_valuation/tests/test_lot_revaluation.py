@@ -0,0 +1,68 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+import base64
+
+from odoo.exceptions import AccessError, UserError
+from odoo.tests import tagged
+from odoo.tests.common import new_test_user
+
+from .common import LotValuationCommon
+
+
+@tagged("post_install", "-at_install")
+class TestLotRevaluation(LotValuationCommon):
+    def _file(self, content):
+        return base64.b64encode(content.encode())
+
+    def test_revalue(self):
+        lot = self._create_lot(self.product_lot, "REVAL-1")
+        self._receive(self.product_lot, [(lot, 4.0)], 10.0)
+        layers = self.env["stock.lot"].revalue({lot.id: 15.0})
+        self.assertAlmostEqual(lot.unit_price, 15.0)
+        self.assertAlmostEqual(layers.value, 20.0)
+        self.assertEqual(layers.lot_ids, lot)
+        self.assertAlmostEqual(self._get_quant(self.product_lot, lot).lot_value, 60.0)
+
+    def test_deliver_after_revalue(self):
+        lot = self._create_lot(self.product_lot, "REVAL-3")
+        receipt = self._receive(self.product_lot, [(lot, 4.0)], 10.0)
+        self.env["stock.lot"].revalue({lot.id: 15.0})
+        in_layer = receipt.move_ids.stock_valuation_layer_ids
+        self.assertAlmostEqual(in_layer.remaining_value, 60.0)
+
+        # the deliveries are valued at the new price and take the revaluation out of the stock value
+        delivery = self._deliver(self.product_lot, [(lot, 3.0)])
+        self.assertAlmostEqual(delivery.move_ids.stock_valuation_layer_ids.value, -45.0)
+        delivery = self._deliver(self.product_lot, [(lot, 1.0)])
+        self.assertAlmostEqual(delivery.move_ids.stock_valuation_layer_ids.value, -15.0)
+        layers = self.env["stock.valuation.layer"].search([("product_id", "=", self.product_lot.id)])
+        self.assertAlmostEqual(sum(layers.mapped("value")), 0.0)
+        self.assertAlmostEqual(in_layer.remaining_value, 0.0)
+        self.assertAlmostEqual(lot.remaining_value, 0.0)
+
+    def test_revalue_requires_manager(self):
+        lot = self._create_lot(self.product_lot, "REVAL-4")
+        self._receive(self.product_lot, [(lot, 1.0)], 10.0)
+        user = new_test_user(self.env, login="lot_revaluation_user", groups="stock.group_stock_user")
+        with self.assertRaises(AccessError):
+            self.env["stock.lot"].with_user(user).revalue({lot.id: 15.0})
+        self.assertAlmostEqual(lot.unit_price, 10.0)
+
+    def test_file_ambiguous_lot(self):
+        other_product = self._create_product("Other lot product", "lot")
+        for product in (self.product_lot, other_product):
+            self._create_lot(product, "REVAL-DUP")
+        wizard = self.env["stock.lot.revaluation"].create(
+            {"source": "file", "file": self._file("lot,unit_price\nREVAL-DUP,3\n")}
+        )
+        with self.assertRaises(UserError):
+            wizard.do_revaluation()
+
+    def test_file_bad_price(self):
+        self._create_lot(self.product_lot, "REVAL-2")
+        wizard = self.env["stock.lot.revaluation"].create(
+            {"source": "file", "file": self._file("lot,unit_price\nREVAL-2,abc\n")}
+        )
+        with self.assertRaises(UserError):
+            wizard.do_revaluation()
@@ -0,0 +1,39 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import LotValuationCommon
+
+
+@tagged("post_install", "-at_install")
+class TestLotValuationSnapshot(LotValuationCommon):
+    def test_valuation_at_date(self):
+        lot = self._create_lot(self.product_lot, "SNAP-1")
+        self._receive(self.product_lot, [(lot, 10.0)], 5.0)
+        self._deliver(self.product_lot, [(lot, 4.0)])
+        today = fields.Date.context_today(self.env["stock.lot.valuation.snapshot"])
+
+        report = self.env["stock.lot.valuation.report"].create({"date": today})
+        report.action_open()
+        line = report.line_ids.filtered(lambda report_line: report_line.lot_id == lot)
+        self.assertAlmostEqual(line.quantity, 6.0)
+        self.assertAlmostEqual(line.value, 30.0)
+
+        Snapshot = self.env["stock.lot.valuation.snapshot"]
+        Snapshot._take_snapshot(today, self.company)
+        snapshot = Snapshot.search([("lot_id", "=", lot.id), ("date", "=", today)])
+        self.assertAlmostEqual(snapshot.quantity, 6.0)
+        self.assertAlmostEqual(snapshot.value, 30.0)
+
+    def test_date_before_ledger_opening(self):
+        lot = self._create_lot(self.product_lot, "SNAP-2")
+        self._receive(self.product_lot, [(lot, 1.0)], 5.0)
+        opening = self.env["stock.lot.valuation.snapshot"]._get_ledger_opening(self.company)
+        report = self.env["stock.lot.valuation.report"].create({"date": opening.date() - timedelta(days=2)})
+        with self.assertRaises(UserError):
+            report.action_open()
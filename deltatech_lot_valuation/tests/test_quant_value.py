@@ -0,0 +1,26 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from odoo.tests import tagged
+
+from .common import LotValuationCommon
+
+
+@tagged("post_install", "-at_install")
+class TestQuantValue(LotValuationCommon):
+    def test_fifo_quant_value(self):
+        self._receive(self.product_untracked, [(False, 1.0)], 10.0)
+        self._receive(self.product_untracked, [(False, 1.0)], 20.0)
+        quant = self._get_quant(self.product_untracked)
+        self.assertAlmostEqual(quant.value, 30.0)
+        self.assertAlmostEqual(quant.value, self.product_untracked.value_svl)
+
+    def test_standard_cost_quant_value(self):
+        category = self.env["product.category"].create({"name": "Standard", "property_cost_method": "standard"})
+        product = self._create_product("Standard product", "none", category)
+        self._receive(product, [(False, 4.0)], 10.0)
+        # change the cost without revaluation layer: the quant follows the standard price, not the layers
+        product.with_context(disable_auto_svl=True).standard_price = 12.0
+        quant = self._get_quant(product)
+        quant.invalidate_recordset(["value"])
+        self.assertAlmostEqual(quant.value, 48.0)
@@ -0,0 +1,6 @@
+# ©  2008-2022 Deltatech
+# See README.rst file on addons root folder for license details
+
+from . import stock_lot_valuation_report
+from . import stock_lot_revaluation
+from . import stock_lot_import
@@ -0,0 +1,36 @@
+# ©  2008-2022 Deltatech
+#              Dorin Hongu <dhongu(@)gmail(.)com
+# See README.rst file on addons root folder for license details
+
+import base64
+import csv
+import io
+
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+
+
+class StockLotImport(models.TransientModel):
+    _name = "stock.lot.import"
+    _description = "Lot Import"
+
+    picking_id = fields.Many2one(
+        "stock.picking", required=True, default=lambda self: self.env.context.get("active_id"), ondelete="cascade"
+    )
+    file = fields.Binary(
+        "CSV File",
+        required=True,
+        help="Columns: lot and optionally product (internal reference), quantity and price_unit",
+    )
+    filename = fields.Char()
+
+    def do_import(self):
+        self.ensure_one()
+        try:
+            rows = list(csv.DictReader(io.StringIO(base64.b64decode(self.file).decode("utf-8-sig"))))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise UserError(_("The file could not be read: %s") % e) from e
+        if not rows or "lot" not in rows[0]:
+            raise UserError(_("The file must have the column lot."))
+        self.picking_id.import_lots([dict(row, name=row["lot"]) for row in rows])
+        return {"type": "ir.actions.act_window_close"}
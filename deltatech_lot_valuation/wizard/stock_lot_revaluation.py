@@ -0,0 +1,88 @@
+# ©  2008-2022 Deltatech
+#              Dorin Hongu <dhongu(@)gmail(.)com
+# See README.rst file on addons root folder for license details
+
+import base64
+import csv
+import io
+from collections import defaultdict
+
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from odoo.tools.safe_eval import safe_eval
+
+
+class StockLotRevaluation(models.TransientModel):
+    _name = "stock.lot.revaluation"
+    _description = "Lot Revaluation"
+
+    source = fields.Selection([("domain", "Lots filter"), ("file", "CSV file")], required=True, default="domain")
+    domain = fields.Char(default="[]")
+    unit_price = fields.Float("New Unit Price")
+    file = fields.Binary("CSV File", help="Columns: lot, unit_price and optionally product (internal reference)")
+    filename = fields.Char()
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
+
+    def _get_file_unit_prices(self):
+        try:
+            rows = list(csv.DictReader(io.StringIO(base64.b64decode(self.file).decode("utf-8-sig"))))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise UserError(_("The file could not be read: %s") % e) from e
+        if not rows or not {"lot", "unit_price"} <= set(rows[0]):
+            raise UserError(_("The file must have the columns lot and unit_price."))
+
+        lots_by_name = defaultdict(list)
+        for names in split_every(10000, {row["lot"] for row in rows}):
+            lots = self.env["stock.lot"].search([("name", "in", list(names)), ("company_id", "=", self.company_id.id)])
+            for lot in lots:
+                lots_by_name[lot.name].append(lot)
+
+        unit_prices = {}
+        missing = []
+        ambiguous = []
+        # the first line of the file is the header
+        for line, row in enumerate(rows, start=2):
+            product = row.get("product") or None
+            lots = [
+                lot
+                for lot in lots_by_name[row["lot"]]
+                if product is None or (lot.product_id.default_code or "") == product
+            ]
+            if not lots:
+                missing.append(row["lot"])
+                continue
+            if len(lots) > 1:
+                ambiguous.append(row["lot"])
+                continue
+            try:
+                unit_prices[lots[0].id] = float(row["unit_price"])
+            except (TypeError, ValueError) as e:
+                raise UserError(
+                    _("Line %(line)s: the unit price %(price)r is not a number.")
+                    % {"line": line, "price": row["unit_price"]}
+                ) from e
+        if missing:
+            raise UserError(_("Lots not found: %s") % ", ".join(missing[:20]))
+        if ambiguous:
+            raise UserError(
+                _("Lots found for more than one product, fill the product column: %s") % ", ".join(ambiguous[:20])
+            )
+        return unit_prices
+
+    def do_revaluation(self):
+        self.ensure_one()
+        if self.source == "file":
+            if not self.file:
+                raise UserError(_("Please select the CSV file."))
+            unit_prices = self._get_file_unit_prices()
+        else:
+            domain = safe_eval(self.domain or "[]") + [("company_id", "=", self.company_id.id)]
+            lots = self.env["stock.lot"].search(domain)
+            unit_prices = dict.fromkeys(lots.ids, self.unit_price)
+        layers = self.env["stock.lot"].revalue(unit_prices)
+
+        action = self.env["ir.actions.actions"]._for_xml_id("stock_account.stock_valuation_layer_action")
+        action["domain"] = [("id", "in", layers.ids)]
+        action["context"] = {}
+        return action
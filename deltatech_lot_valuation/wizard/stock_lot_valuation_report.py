@@ -0,0 +1,49 @@
+# ©  2008-2022 Deltatech
+#              Dorin Hongu <dhongu(@)gmail(.)com
+# See README.rst file on addons root folder for license details
+
+from odoo import fields, models
+
+
+class StockLotValuationReport(models.TransientModel):
+    _name = "stock.lot.valuation.report"
+    _description = "Lot Valuation at Date"
+
+    date = fields.Date(required=True, default=fields.Date.context_today)
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
+    line_ids = fields.One2many("stock.lot.valuation.report.line", "report_id")
+
+    def action_open(self):
+        self.ensure_one()
+        self.line_ids.unlink()
+        query, params = self.env["stock.lot.valuation.snapshot"]._get_valuation_query(self.date, self.company_id)
+        self.env.cr.execute(
+            """
+            INSERT INTO stock_lot_valuation_report_line (lot_id, product_id, location_id, company_id, quantity, value,
+                                                         report_id, create_uid, create_date, write_uid, write_date)
+            SELECT valuation.*, %(report_id)s, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM ({query}) AS valuation
+            """.format(
+                query=query
+            ),
+            dict(params, report_id=self.id, uid=self.env.uid),
+        )
+        self.invalidate_recordset(["line_ids"])
+        action = self.env["ir.actions.actions"]._for_xml_id("deltatech_lot_valuation.action_lot_valuation_report_line")
+        action["domain"] = [("report_id", "=", self.id)]
+        action["display_name"] = f"{action['name']} - {self.date}"
+        return action
+
+
+class StockLotValuationReportLine(models.TransientModel):
+    _name = "stock.lot.valuation.report.line"
+    _description = "Lot Valuation at Date Line"
+    _order = "product_id, lot_id, location_id"
+
+    report_id = fields.Many2one("stock.lot.valuation.report", required=True, index=True, ondelete="cascade")
+    lot_id = fields.Many2one("stock.lot", readonly=True)
+    product_id = fields.Many2one("product.product", readonly=True)
+    location_id = fields.Many2one("stock.location", readonly=True)
+    company_id = fields.Many2one("res.company", readonly=True)
+    quantity = fields.Float(readonly=True)
+    value = fields.Float(readonly=True)
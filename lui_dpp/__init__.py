@@ -1 +1,4 @@
-from . import models 
\ No newline at end of file
+from . import models 
+from . import controllers
+from . import wizard
+from . import cli
@@ -1,12 +1,17 @@
 {
     'name': 'LUI DPP',
-    'version': '1.0',
+    'version': '1.1',
     'category': 'Accounting',
     'summary': 'LUI DPP',
     'description': """
     """,
     'depends': ['account', 'sale', 'purchase'],
     'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
+        'views/dpp_rule_view.xml',
+        'wizard/efaktur_export_view.xml',
+        'views/ir_actions_report_view.xml',
         'views/account_move_view.xml',
         # 'views/sale_order_view.xml',
         'views/purchase_order_view.xml',
@@ -0,0 +1,2 @@
+from . import recompute_dpp
+from . import efaktur_export
@@ -0,0 +1,36 @@
+import argparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+
+
+class EfakturExport(Command):
+    """ Export the tax base amount of the posted customer invoices for e-Faktur, as CSV or XML """
+
+    name = 'efaktur_export'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(prog=f'{Path(sys.argv[0]).name} {self.name}', description=self.__doc__)
+        parser.add_argument('-c', '--config', help='Odoo configuration file')
+        parser.add_argument('-d', '--database', required=True, help='Database name')
+        parser.add_argument('--company', type=int, action='append', help='Company id, all companies by default')
+        parser.add_argument('--date-from', help='First accounting date, YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Last accounting date, YYYY-MM-DD')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'xml'], default='csv')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Number of invoices read at once')
+        parser.add_argument('-o', '--output', help='Output file, standard output by default')
+        args = parser.parse_args(cmdargs)
+
+        odoo.tools.config.parse_config(['-d', args.database] + (['-c', args.config] if args.config else []))
+        with odoo.registry(args.database).cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            company_ids = args.company or env['res.company'].search([]).ids
+            stream = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+            try:
+                env['dpp.export'].export_efaktur(stream, args.date_from, args.date_to, company_ids,
+                                                 args.file_format, args.batch_size)
+            finally:
+                if args.output:
+                    stream.close()
@@ -0,0 +1,29 @@
+import argparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+
+
+class RecomputeDpp(Command):
+    """ Recompute the tax base amount (DPP) of the documents of a period, by chunks """
+
+    name = 'recompute_dpp'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(prog=f'{Path(sys.argv[0]).name} {self.name}', description=self.__doc__)
+        parser.add_argument('-c', '--config', help='Odoo configuration file')
+        parser.add_argument('-d', '--database', required=True, help='Database name')
+        parser.add_argument('--company', type=int, help='Company id, all companies by default')
+        parser.add_argument('--date-from', help='First document date, YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Last document date, YYYY-MM-DD')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Number of documents per transaction')
+        args = parser.parse_args(cmdargs)
+
+        odoo.tools.config.parse_config(['-d', args.database] + (['-c', args.config] if args.config else []))
+        with odoo.registry(args.database).cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            company = env['res.company'].browse(args.company) if args.company else None
+            env['dpp.rule']._recompute_tax_base(company, args.date_from, args.date_to,
+                                                chunk_size=args.chunk_size, commit=True)
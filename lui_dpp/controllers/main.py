@@ -0,0 +1,29 @@
+from odoo import api, fields, http
+from odoo.http import request
+
+
+class DppExportController(http.Controller):
+
+    @http.route('/lui_dpp/efaktur/export', type='http', auth='user')
+    def efaktur_export(self, date_from=None, date_to=None, company_id=None, file_format='csv', **kwargs):
+        request.env['account.move'].check_access_rights('read')
+        company_ids = request.env.companies.ids
+        if company_id:
+            company_ids = [int(company_id)] if int(company_id) in request.env.user.company_ids.ids else []
+        file_format = 'xml' if file_format == 'xml' else 'csv'
+        # the request is gone when the response is streamed, keep what the generator needs
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+
+        def generate():
+            # the request cursor is closed once the response is returned, stream with our own
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                for chunk in env['dpp.export']._generate_efaktur(
+                        date_from or None, date_to or None, company_ids, file_format):
+                    yield chunk.encode()
+
+        filename = 'efaktur_%s_%s.%s' % (date_from or '', date_to or fields.Date.today(), file_format)
+        return request.make_response(generate(), headers=[
+            ('Content-Type', 'application/xml' if file_format == 'xml' else 'text/csv'),
+            ('Content-Disposition', 'attachment; filename=%s' % filename),
+        ])
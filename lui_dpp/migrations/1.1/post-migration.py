@@ -0,0 +1,9 @@
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """ Drop the PDF cached before the rendering language was part of the cache key """
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['report.pdf.cache'].search([('context_key', '=', '')]).unlink()
@@ -0,0 +1,7 @@
+def migrate(cr, version):
+    """ The cached PDF have no rendering language, mark them so the required column can be added, they are
+    removed after the update """
+    if not version:
+        return
+    cr.execute("ALTER TABLE IF EXISTS report_pdf_cache ADD COLUMN IF NOT EXISTS context_key varchar")
+    cr.execute("UPDATE report_pdf_cache SET context_key = '' WHERE context_key IS NULL")
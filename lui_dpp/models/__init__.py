@@ -1,3 +1,10 @@
+from . import dpp_mixin
+from . import dpp_rule
 from . import account_move
 from . import sale_order
-from . import purchase_order 
\ No newline at end of file
+from . import purchase_order 
+from . import dpp_export
+from . import report_pdf_cache
+from . import ir_actions_report
+from . import ir_ui_view
+from . import res_company
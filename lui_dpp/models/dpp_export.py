@@ -0,0 +1,110 @@
+import csv
+import io
+import uuid
+from xml.sax.saxutils import quoteattr
+
+from odoo import api, fields, models
+
+EFAKTUR_COLUMNS = [
+    'number', 'move_type', 'invoice_date', 'date', 'partner', 'partner_vat',
+    'amount_untaxed', 'tax_base_amount', 'amount_tax', 'amount_total', 'currency',
+]
+
+
+class DppExport(models.AbstractModel):
+    _name = 'dpp.export'
+    _description = 'e-Faktur Tax Base Export'
+
+    @api.model
+    def _get_efaktur_query(self, date_from, date_to, company_ids):
+        """ Query of the invoices the user can read, the record rules applied as for a search """
+        Move = self.env['account.move'].with_context(allowed_company_ids=list(company_ids))
+        Move.check_access_rights('read')
+        domain = [
+            ('state', '=', 'posted'),
+            ('move_type', 'in', ('out_invoice', 'out_refund')),
+            ('company_id', 'in', list(company_ids)),
+        ]
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        query = Move._where_calc(domain)
+        Move._apply_ir_rules(query, 'read')
+        move_ids, params = query.subselect()
+        return """
+            SELECT m.name, m.move_type, m.invoice_date, m.date, p.name, p.vat,
+                   m.amount_untaxed, m.tax_base_amount, m.amount_tax, m.amount_total, c.name
+              FROM account_move m
+              LEFT JOIN res_partner p ON p.id = COALESCE(m.commercial_partner_id, m.partner_id)
+              JOIN res_currency c ON c.id = m.currency_id
+             WHERE m.id IN ({move_ids})
+             ORDER BY m.date, m.id
+        """.format(move_ids=move_ids), params
+
+    @api.model
+    def _iter_efaktur_batches(self, date_from=None, date_to=None, company_ids=None, batch_size=2000):
+        """ Posted customer invoices of the period, read by batches through a server-side cursor """
+        self.env['account.move'].flush_model([
+            'name', 'move_type', 'invoice_date', 'date', 'state', 'company_id', 'commercial_partner_id',
+            'partner_id', 'currency_id', 'amount_untaxed', 'tax_base_amount', 'amount_tax', 'amount_total',
+        ])
+        if company_ids is None:
+            company_ids = self.env.companies.ids
+        if not company_ids:
+            return
+        query, params = self._get_efaktur_query(date_from, date_to, company_ids)
+        # named cursor: the rows stay on the server, only one batch is held in memory
+        cursor = self.env.cr._cnx.cursor('efaktur_export_%s' % uuid.uuid4().hex)
+        try:
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    @api.model
+    def _generate_efaktur(self, date_from=None, date_to=None, company_ids=None, file_format='csv', batch_size=2000):
+        """ Yield the export as text chunks, one chunk per batch of invoices """
+        batches = self._iter_efaktur_batches(date_from, date_to, company_ids, batch_size)
+        if file_format == 'xml':
+            yield '<?xml version="1.0" encoding="utf-8"?>\n<efaktur>\n'
+            for rows in batches:
+                yield ''.join(
+                    '  <invoice %s/>\n' % ' '.join(
+                        '%s=%s' % (column, quoteattr(self._format_value(value)))
+                        for column, value in zip(EFAKTUR_COLUMNS, row))
+                    for row in rows)
+            yield '</efaktur>\n'
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EFAKTUR_COLUMNS)
+            for rows in batches:
+                writer.writerows([self._format_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+    @api.model
+    def _format_value(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, float):
+            return '%.2f' % value
+        if hasattr(value, 'isoformat'):
+            return fields.Date.to_string(value)
+        return str(value)
+
+    @api.model
+    def export_efaktur(self, stream, date_from=None, date_to=None, company_ids=None, file_format='csv',
+                       batch_size=2000):
+        """ Write the e-Faktur export to a text file object, batch after batch """
+        for chunk in self._generate_efaktur(date_from, date_to, company_ids, file_format, batch_size):
+            stream.write(chunk)
+        return True
@@ -0,0 +1,29 @@
+from odoo import api, fields, models
+
+# ratio used when the company has no DPP rule for the document date
+DEFAULT_DPP_RATIO = 11 / 12
+
+
+class DppMixin(models.AbstractModel):
+    _name = 'dpp.mixin'
+    _description = 'DPP (Tax Base Amount)'
+
+    # date field choosing the DPP rule, set by the inheriting models
+    _dpp_date_field = None
+
+    tax_base_amount = fields.Monetary(
+        string='Tax Base Amount',
+        compute='_compute_tax_base_amount',
+        store=True,
+        currency_field='currency_id',
+    )
+
+    @api.depends(lambda self: ('amount_untaxed', 'company_id') + ((self._dpp_date_field,) if self._dpp_date_field else ()))
+    def _compute_tax_base_amount(self):
+        rules = self.env['dpp.rule'].sudo().search([('company_id', 'in', self.company_id.ids)])
+        for record in self:
+            if not record.amount_untaxed:
+                record.tax_base_amount = 0.0
+                continue
+            ratio = rules._get_ratio(record.company_id, record[self._dpp_date_field])
+            record.tax_base_amount = record.amount_untaxed * ratio
@@ -0,0 +1,139 @@
+import logging
+
+from odoo import _, api, fields, models
+from odoo.exceptions import ValidationError
+from odoo.tools import split_every
+
+from .dpp_mixin import DEFAULT_DPP_RATIO
+
+_logger = logging.getLogger(__name__)
+
+
+class DppRule(models.Model):
+    _name = 'dpp.rule'
+    _description = 'DPP Rule'
+    _order = 'company_id, date_from desc'
+
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+    date_from = fields.Date('Start Date')
+    date_to = fields.Date('End Date')
+    ratio = fields.Float(required=True, digits=(16, 10), default=DEFAULT_DPP_RATIO,
+                         help="Tax base amount = untaxed amount * ratio")
+
+    @api.constrains('company_id', 'date_from', 'date_to')
+    def _check_overlap(self):
+        for rule in self:
+            if rule.date_from and rule.date_to and rule.date_from > rule.date_to:
+                raise ValidationError(_("The start date must be before the end date."))
+            domain = [('id', '!=', rule.id), ('company_id', '=', rule.company_id.id)]
+            if rule.date_from:
+                domain += ['|', ('date_to', '=', False), ('date_to', '>=', rule.date_from)]
+            if rule.date_to:
+                domain += ['|', ('date_from', '=', False), ('date_from', '<=', rule.date_to)]
+            if self.search_count(domain):
+                raise ValidationError(_("The DPP rules of a company can not overlap."))
+
+    def _get_ratio(self, company, date):
+        """ Ratio of the rule of the company covering the date, among the rules in self """
+        date = fields.Date.to_date(date)
+        for rule in self:
+            if rule.company_id == company \
+                    and (not rule.date_from or (date and rule.date_from <= date)) \
+                    and (not rule.date_to or (date and rule.date_to >= date)):
+                return rule.ratio
+        return DEFAULT_DPP_RATIO
+
+    def _get_periods(self):
+        return [(rule.company_id, rule.date_from, rule.date_to) for rule in self]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        rules._recompute_periods(rules._get_periods())
+        return rules
+
+    def write(self, vals):
+        periods = self._get_periods()
+        res = super().write(vals)
+        self._recompute_periods(periods + self._get_periods())
+        return res
+
+    def unlink(self):
+        periods = self._get_periods()
+        res = super().unlink()
+        self._recompute_periods(periods)
+        return res
+
+    def _recompute_periods(self, periods):
+        """ Queue the recompute of the tax base of the periods, done by the cron in committed chunks """
+        self.env['dpp.recompute.request'].sudo().create([
+            {'company_id': company.id, 'date_from': date_from, 'date_to': date_to}
+            for company, date_from, date_to in set(periods)
+        ])
+        self.env.ref('lui_dpp.ir_cron_dpp_recompute')._trigger()
+
+    @api.model
+    def _cron_recompute_periods(self):
+        commit = not self.env.registry.in_test_mode()
+        for request in self.env['dpp.recompute.request'].sudo().search([]):
+            self._recompute_tax_base(request.company_id, request.date_from, request.date_to, commit=commit)
+            request.unlink()
+            if commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    @api.model
+    def _get_dpp_models(self):
+        return [name for name, model in self.env.registry.items()
+                if not model._abstract and getattr(model, '_dpp_date_field', None)]
+
+    @api.model
+    def _recompute_tax_base(self, company=None, date_from=None, date_to=None, chunk_size=10000, commit=False):
+        """ Recompute the tax base amount of the documents of the period with SQL, by chunks of ids """
+        for model_name in self._get_dpp_models():
+            model = self.env[model_name]
+            model.flush_model(['amount_untaxed', 'company_id', 'currency_id', model._dpp_date_field])
+            date_column = 'doc.%s::date' % model._dpp_date_field
+            where, params = ['TRUE'], {'default': DEFAULT_DPP_RATIO}
+            if company:
+                where.append('doc.company_id = %(company_id)s')
+                params['company_id'] = company.id
+            if date_from:
+                where.append(date_column + ' >= %(date_from)s')
+                params['date_from'] = date_from
+            if date_to:
+                where.append(date_column + ' <= %(date_to)s')
+                params['date_to'] = date_to
+            where = ' AND '.join(where)
+
+            self.env.cr.execute(f'SELECT doc.id FROM {model._table} doc WHERE {where} ORDER BY doc.id', params)
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            done = 0
+            for chunk_ids in split_every(chunk_size, ids):
+                self.env.cr.execute(f"""
+                    UPDATE {model._table} doc
+                       SET tax_base_amount = ROUND(COALESCE(doc.amount_untaxed, 0) * COALESCE((
+                           SELECT rule.ratio
+                             FROM dpp_rule rule
+                            WHERE rule.company_id = doc.company_id
+                              AND (rule.date_from IS NULL OR rule.date_from <= {date_column})
+                              AND (rule.date_to IS NULL OR rule.date_to >= {date_column})
+                            ORDER BY rule.date_from DESC NULLS LAST
+                            LIMIT 1), %(default)s)::numeric / cur.rounding) * cur.rounding
+                      FROM res_currency cur
+                     WHERE doc.id = ANY(%(ids)s) AND cur.id = doc.currency_id
+                """, dict(params, ids=list(chunk_ids)))
+                done += len(chunk_ids)
+                if commit:
+                    self.env.cr.commit()  # pylint: disable=invalid-commit
+                _logger.info("%s tax base amount: %s/%s documents recomputed", model_name, done, len(ids))
+            model.invalidate_model(['tax_base_amount'])
+        return True
+
+
+class DppRecomputeRequest(models.Model):
+    _name = 'dpp.recompute.request'
+    _description = 'DPP Tax Base Recompute Request'
+
+    company_id = fields.Many2one('res.company', required=True, ondelete='cascade')
+    date_from = fields.Date('Start Date')
+    date_to = fields.Date('End Date')
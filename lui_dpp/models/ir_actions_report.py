@@ -0,0 +1,84 @@
+import io
+from collections import OrderedDict
+
+from odoo import api, fields, models
+
+# relations read for the whole batch before templating, per report model
+REPORT_PREFETCH = {
+    'sale.order': [
+        'partner_id', 'partner_invoice_id', 'partner_shipping_id', 'user_id', 'currency_id', 'payment_term_id',
+        'fiscal_position_id', 'company_id.partner_id', 'order_line.product_id', 'order_line.product_template_id',
+        'order_line.product_uom', 'order_line.tax_id',
+    ],
+    'purchase.order': [
+        'partner_id', 'user_id', 'currency_id', 'payment_term_id', 'fiscal_position_id', 'company_id.partner_id',
+        'order_line.product_id', 'order_line.product_uom', 'order_line.taxes_id',
+    ],
+    'account.move': [
+        'partner_id', 'partner_shipping_id', 'invoice_user_id', 'currency_id', 'invoice_payment_term_id',
+        'fiscal_position_id', 'company_id.partner_id', 'invoice_line_ids.product_id',
+        'invoice_line_ids.product_uom_id', 'invoice_line_ids.tax_ids',
+    ],
+}
+
+# keys of the report data that are not rendering options
+REPORT_DATA_IGNORED_KEYS = {'report_type', 'context'}
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    pdf_cache = fields.Boolean(
+        'Cache PDF', help="Keep the rendered PDF of each document until the document is modified")
+
+    def action_clear_pdf_cache(self):
+        self.env['report.pdf.cache'].sudo()._invalidate(report_ids=self.ids)
+        return True
+
+    @api.model
+    def _prefetch_report_data(self, records):
+        """ Read the documents and their related records for the whole batch, so the templates read them from the record cache """
+        records.mapped('display_name')
+        for path in REPORT_PREFETCH.get(records._name, []):
+            records.mapped(path).mapped('display_name')
+        records.company_id.mapped('logo')
+
+    def _render_qweb_pdf_prepare_streams(self, report_ref, data, res_ids=None):
+        report_sudo = self._get_report(report_ref)
+        options = {key: value for key, value in (data or {}).items() if key not in REPORT_DATA_IGNORED_KEYS}
+        # documents rendered with extra data or options (pro-forma, ...) are not cached
+        if not res_ids or options or not report_sudo.pdf_cache or self.env.context.get('proforma') \
+                or len(set(res_ids)) != len(res_ids):
+            if res_ids and report_sudo.model in REPORT_PREFETCH:
+                self._prefetch_report_data(self.env[report_sudo.model].browse(res_ids))
+            return super()._render_qweb_pdf_prepare_streams(report_ref, data, res_ids=res_ids)
+
+        cache = self.env['report.pdf.cache'].sudo()
+        records = self.env[report_sudo.model].browse(res_ids)
+        # a cached PDF is served without rendering, check the access the rendering would have checked
+        records.check_access_rights('read')
+        records.check_access_rule('read')
+        cached = cache._get(report_sudo, records)
+        missing = records.filtered(lambda record: record.id not in cached)
+        rendered = OrderedDict()
+        if missing:
+            self._prefetch_report_data(missing)
+            rendered = super()._render_qweb_pdf_prepare_streams(report_ref, data, res_ids=missing.ids)
+            if False not in rendered:
+                cache._store(report_sudo, missing, {
+                    res_id: stream_data['stream'].getvalue()
+                    for res_id, stream_data in rendered.items() if stream_data['stream']
+                })
+            elif cached:
+                # the batch could not be split per document, render them all together
+                return super()._render_qweb_pdf_prepare_streams(report_ref, data, res_ids=res_ids)
+            else:
+                return rendered
+
+        collected_streams = OrderedDict()
+        for res_id in res_ids:
+            if res_id in cached:
+                collected_streams[res_id] = {'stream': io.BytesIO(cached[res_id]), 'attachment': None}
+            else:
+                collected_streams[res_id] = rendered[res_id]
+        return collected_streams
@@ -0,0 +1,26 @@
+from odoo import api, models
+
+
+class IrUiView(models.Model):
+    _inherit = 'ir.ui.view'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        views = super().create(vals_list)
+        views._invalidate_pdf_cache()
+        return views
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'arch_db' in vals or 'arch' in vals or 'active' in vals or 'inherit_id' in vals:
+            self._invalidate_pdf_cache()
+        return res
+
+    def unlink(self):
+        self._invalidate_pdf_cache()
+        return super().unlink()
+
+    def _invalidate_pdf_cache(self):
+        views = self.filtered(lambda view: view.type == 'qweb')
+        if views:
+            self.env['report.pdf.cache'].sudo()._invalidate_views(views)
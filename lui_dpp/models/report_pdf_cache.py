@@ -0,0 +1,176 @@
+import base64
+import hashlib
+
+import psycopg2
+
+from odoo import api, fields, models
+
+from .ir_actions_report import REPORT_PREFETCH
+
+# total size of the cached PDFs, in MB, before the least recently used ones are evicted
+DEFAULT_CACHE_SIZE = 256
+
+# context keys changing the rendering of a document, part of the cache key
+REPORT_CACHE_CONTEXT_KEYS = ('lang', 'tz')
+
+# templates wrapping every report, their change drops the whole cache
+REPORT_LAYOUT_VIEWS = (
+    'web.external_layout', 'web.internal_layout', 'web.report_layout', 'web.html_container', 'web.address_layout',
+)
+
+
+class ReportPdfCache(models.Model):
+    _name = 'report.pdf.cache'
+    _description = 'Rendered PDF Report Cache'
+    _order = 'last_used desc'
+
+    report_id = fields.Many2one('ir.actions.report', required=True, ondelete='cascade', readonly=True)
+    res_model = fields.Char(required=True, readonly=True)
+    res_id = fields.Integer(required=True, index=True, readonly=True)
+    # language and timezone of the rendering
+    context_key = fields.Char(required=True, readonly=True)
+    # digest of the write_date of the document and of its printed related records when rendered
+    res_version = fields.Char('Document Version', readonly=True)
+    pdf = fields.Binary(attachment=True, readonly=True)
+    file_size = fields.Integer(readonly=True)
+    last_used = fields.Datetime(index=True, readonly=True, default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('report_res_uniq', 'unique(report_id, res_id, context_key)',
+         'A document has only one cached PDF per report and language.'),
+    ]
+
+    @api.model
+    def _get_version_paths(self, res_model):
+        """ Related records printed with the documents: the prefetched paths and their intermediate records """
+        paths = set()
+        for path in REPORT_PREFETCH.get(res_model, []):
+            names = path.split('.')
+            paths.update('.'.join(names[:index]) for index in range(1, len(names) + 1))
+        return sorted(paths)
+
+    @api.model
+    def _get_version(self, record):
+        """ Digest of the write_date of the document and of its related records, with their microseconds,
+        so any change of a line, product, partner or tax printed on the document renders it again """
+        versions = [(record._name, record.id, record.write_date and record.write_date.isoformat())]
+        for path in self._get_version_paths(record._name):
+            related = record.mapped(path)
+            versions += sorted((related._name, rec.id, rec.write_date and rec.write_date.isoformat())
+                               for rec in related)
+        return hashlib.sha1(repr(versions).encode()).hexdigest()
+
+    @api.model
+    def _get_context_key(self):
+        return repr(tuple(self.env.context.get(key) or '' for key in REPORT_CACHE_CONTEXT_KEYS))
+
+    @api.model
+    def _get(self, report, records):
+        """ Cached PDF of the records still up to date, as {res_id: pdf bytes} """
+        entries = self.search([
+            ('report_id', '=', report.id), ('res_id', 'in', records.ids), ('context_key', '=', self._get_context_key()),
+        ])
+        # read the related records of the whole batch at once
+        for path in self._get_version_paths(records._name):
+            records.mapped(path).mapped('write_date')
+        versions = {record.id: self._get_version(record) for record in records}
+        valid = entries.filtered(lambda entry: entry.res_version == versions.get(entry.res_id))
+        if valid:
+            self.env.cr.execute("UPDATE report_pdf_cache SET last_used = now() at time zone 'UTC' WHERE id IN %s",
+                                [tuple(valid.ids)])
+        return {entry.res_id: base64.b64decode(entry.pdf) for entry in valid if entry.pdf}
+
+    @api.model
+    def _store(self, report, records, pdfs):
+        """ Replace the cached PDF of the records by the ones just rendered, then evict the oldest entries """
+        context_key = self._get_context_key()
+        entries = self.search([
+            ('report_id', '=', report.id), ('res_id', 'in', records.ids), ('context_key', '=', context_key),
+        ])
+        entry_by_res_id = {entry.res_id: entry for entry in entries}
+        vals_list = []
+        for record in records:
+            if not pdfs.get(record.id):
+                continue
+            vals = {
+                'res_version': self._get_version(record),
+                'pdf': base64.b64encode(pdfs[record.id]),
+                'file_size': len(pdfs[record.id]),
+                'last_used': fields.Datetime.now(),
+            }
+            if record.id in entry_by_res_id:
+                entry_by_res_id[record.id].write(vals)
+            else:
+                vals_list.append(dict(
+                    vals, report_id=report.id, res_model=record._name, res_id=record.id, context_key=context_key))
+        if vals_list:
+            try:
+                with self.env.cr.savepoint():
+                    self.create(vals_list)
+            except psycopg2.IntegrityError:
+                # documents cached meanwhile by a concurrent print: keep theirs, the fresh render is served anyway
+                for vals in vals_list:
+                    try:
+                        with self.env.cr.savepoint():
+                            self.create(vals)
+                    except psycopg2.IntegrityError:
+                        continue
+        self._evict()
+
+    @api.model
+    def _invalidate_views(self, views):
+        """ Drop the cached PDF of the reports rendered with the qweb views: the reports whose template is the
+        view, or the view it extends, or is called by it; all of them for the layout templates """
+        keys = set()
+        for view in views:
+            while view:
+                if view.key:
+                    keys.add(view.key)
+                view = view.inherit_id
+        if not keys:
+            return True
+        if any(key.startswith(REPORT_LAYOUT_VIEWS) for key in keys):
+            return self._invalidate()
+        self.flush_model(['report_id'])
+        self.env.cr.execute("SELECT DISTINCT report_id FROM report_pdf_cache")
+        reports = self.env['ir.actions.report'].browse([row[0] for row in self.env.cr.fetchall()])
+        # the document template of a report is named after it, as sale.report_saleorder_document, or after the
+        # reports calling it, as account.report_invoice_document for account.report_invoice_with_payments
+        stems = {key[:-len('_document')] if key.endswith('_document') else key for key in keys}
+        report_ids = [report.id for report in reports if report.report_name and (
+            any(key.startswith(report.report_name) for key in keys)
+            or any(report.report_name.startswith(stem) for stem in stems))]
+        if report_ids:
+            self._invalidate(report_ids=report_ids)
+        return True
+
+    @api.model
+    def _evict(self):
+        """ Drop the least recently used entries beyond the size limit """
+        size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'lui_dpp.report_pdf_cache_size', DEFAULT_CACHE_SIZE)) * 1024 * 1024
+        self.flush_model(['file_size', 'last_used'])
+        self.env.cr.execute("""
+            SELECT id FROM (
+                SELECT id, sum(file_size) OVER (ORDER BY last_used DESC, id DESC) AS total_size
+                  FROM report_pdf_cache
+            ) cache
+             WHERE total_size > %s
+        """, [size])
+        evicted = [row[0] for row in self.env.cr.fetchall()]
+        if evicted:
+            self.browse(evicted).unlink()
+
+    @api.model
+    def _invalidate(self, res_model=None, res_ids=None, report_ids=None):
+        """ Drop the cached PDF of the documents, of the reports, or everything """
+        domain = []
+        if res_model:
+            domain.append(('res_model', '=', res_model))
+        if res_ids is not None:
+            domain.append(('res_id', 'in', list(res_ids)))
+        if report_ids is not None:
+            domain.append(('report_id', 'in', list(report_ids)))
+        self.search(domain).unlink()
+        return True
+
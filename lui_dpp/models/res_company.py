@@ -0,0 +1,20 @@
+from odoo import models
+
+# company fields printed in the header and footer of the documents
+REPORT_LAYOUT_FIELDS = {
+    'name', 'logo', 'partner_id', 'street', 'street2', 'city', 'zip', 'state_id', 'country_id', 'vat',
+    'company_registry', 'phone', 'email', 'website', 'report_header', 'report_footer', 'company_details',
+    'external_report_layout_id', 'paperformat_id', 'primary_color', 'secondary_color', 'font',
+    'layout_background', 'layout_background_image', 'currency_id',
+}
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    def write(self, vals):
+        res = super().write(vals)
+        # header, logo and address are printed on every cached document
+        if REPORT_LAYOUT_FIELDS.intersection(vals):
+            self.env['report.pdf.cache'].sudo()._invalidate()
+        return res
@@ -0,0 +1,3 @@
+from . import test_dpp_rule
+from . import test_efaktur_export
+from . import test_report_pdf_cache
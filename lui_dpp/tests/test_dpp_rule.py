@@ -0,0 +1,62 @@
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestDppRule(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.company = cls.company_data['company']
+
+    def _create_rule(self, ratio, date_from='2019-01-01', date_to='2019-12-31'):
+        return self.env['dpp.rule'].create({
+            'company_id': self.company.id,
+            'date_from': date_from,
+            'date_to': date_to,
+            'ratio': ratio,
+        })
+
+    def test_default_ratio(self):
+        invoice = self.init_invoice('out_invoice', amounts=[120.0])
+        self.assertAlmostEqual(invoice.tax_base_amount, 110.0)
+
+    def test_rule_ratio(self):
+        self._create_rule(0.5)
+        invoice = self.init_invoice('out_invoice', invoice_date='2019-06-01', amounts=[120.0])
+        self.assertAlmostEqual(invoice.tax_base_amount, 60.0)
+        outside = self.init_invoice('out_invoice', invoice_date='2020-06-01', amounts=[120.0])
+        self.assertAlmostEqual(outside.tax_base_amount, 110.0)
+
+    def test_rule_change_recomputes_documents(self):
+        invoice = self.init_invoice('out_invoice', invoice_date='2019-06-01', amounts=[100.0], post=True)
+        rule = self._create_rule(1 / 3)
+        requests = self.env['dpp.recompute.request'].search([('company_id', '=', self.company.id)])
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests.date_from, rule.date_from)
+
+        self.env['dpp.rule']._cron_recompute_periods()
+        self.assertFalse(self.env['dpp.recompute.request'].search([]))
+        # the tax base is rounded to the currency
+        self.assertEqual(invoice.tax_base_amount, 33.33)
+
+        rule.ratio = 0.5
+        self.env['dpp.rule']._cron_recompute_periods()
+        self.assertEqual(invoice.tax_base_amount, 50.0)
+
+        rule.unlink()
+        self.env['dpp.rule']._cron_recompute_periods()
+        self.assertEqual(invoice.tax_base_amount, 91.67)
+
+    def test_overlap(self):
+        self._create_rule(0.5)
+        with self.assertRaises(ValidationError):
+            self._create_rule(0.4, date_from='2019-12-01', date_to='2020-12-31')
+        with self.assertRaises(ValidationError):
+            self._create_rule(0.4, date_from=False, date_to=False)
+        with self.assertRaises(ValidationError):
+            self._create_rule(0.4, date_from='2020-12-31', date_to='2020-01-01')
+        self._create_rule(0.4, date_from='2020-01-01', date_to=False)
@@ -0,0 +1,75 @@
+import csv
+import io
+from urllib.parse import urlencode
+from xml.etree import ElementTree
+
+from odoo.tests import HttpCase, tagged
+from odoo.tests.common import new_test_user
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestEfakturExport(AccountTestInvoicingCommon, HttpCase):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.company = cls.company_data['company']
+        cls.invoice = cls.init_invoice('out_invoice', invoice_date='2019-06-01', amounts=[120.0], post=True)
+        cls.refund = cls.init_invoice('out_refund', invoice_date='2019-06-02', amounts=[60.0], post=True)
+        cls.draft = cls.init_invoice('out_invoice', invoice_date='2019-06-03', amounts=[30.0])
+        cls.other_period = cls.init_invoice('out_invoice', invoice_date='2020-06-01', amounts=[30.0], post=True)
+
+    def _export_csv(self, **kwargs):
+        kwargs.setdefault('company_ids', self.company.ids)
+        content = ''.join(self.env['dpp.export']._generate_efaktur('2019-01-01', '2019-12-31', **kwargs))
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_export_csv(self):
+        rows = self._export_csv()
+        self.assertEqual([row['number'] for row in rows], [self.invoice.name, self.refund.name])
+        self.assertEqual(rows[0]['partner'], self.partner_a.name)
+        self.assertEqual(rows[0]['invoice_date'], '2019-06-01')
+        self.assertAlmostEqual(float(rows[0]['amount_untaxed']), 120.0)
+        self.assertAlmostEqual(float(rows[0]['tax_base_amount']), 110.0)
+
+    def test_export_by_batches(self):
+        self.assertEqual(self._export_csv(batch_size=1), self._export_csv())
+        self.assertEqual(self._export_csv(company_ids=[]), [])
+
+    def test_export_record_rules(self):
+        salesman = new_test_user(
+            self.env, login='efaktur_salesman', groups='sales_team.group_sale_salesman',
+            company_id=self.company.id, company_ids=[(6, 0, self.company.ids)])
+        (self.invoice | self.refund).invoice_user_id = self.env.ref('base.user_admin')
+        # a salesman only reads their own invoices and the ones without salesperson
+        rows = self.env['dpp.export'].with_user(salesman)._generate_efaktur(
+            '2019-01-01', '2019-12-31', self.company.ids)
+        self.assertEqual(list(csv.DictReader(io.StringIO(''.join(rows)))), [])
+        self.invoice.invoice_user_id = salesman
+        rows = self.env['dpp.export'].with_user(salesman)._generate_efaktur(
+            '2019-01-01', '2019-12-31', self.company.ids)
+        self.assertEqual([row['number'] for row in csv.DictReader(io.StringIO(''.join(rows)))],
+                         [self.invoice.name])
+
+    def test_export_xml(self):
+        stream = io.StringIO()
+        self.env['dpp.export'].export_efaktur(
+            stream, '2019-01-01', '2019-12-31', self.company.ids, file_format='xml', batch_size=1)
+        root = ElementTree.fromstring(stream.getvalue().encode())
+        self.assertEqual([node.get('number') for node in root], [self.invoice.name, self.refund.name])
+        self.assertEqual(root[1].get('move_type'), 'out_refund')
+
+    def test_export_controller(self):
+        admin = self.env.ref('base.user_admin')
+        admin.company_ids |= self.company
+        self.authenticate('admin', 'admin')
+        response = self.url_open('/lui_dpp/efaktur/export?%s' % urlencode({
+            'date_from': '2019-01-01',
+            'date_to': '2019-12-31',
+            'company_id': self.company.id,
+        }))
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual([row['number'] for row in rows], [self.invoice.name, self.refund.name])
@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+PDF = b'%PDF-1.4 cached'
+
+
+@tagged('post_install', '-at_install')
+class TestReportPdfCache(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.report = cls.env.ref('sale.action_report_saleorder')
+        cls.report.pdf_cache = True
+        cls.orders = cls.env['sale.order'].create([{
+            'partner_id': cls.partner_a.id,
+            'order_line': [(0, 0, {'product_id': cls.product_a.id, 'product_uom_qty': 1.0})],
+        } for _i in range(2)])
+        cls.cache = cls.env['report.pdf.cache']
+
+    def _touch(self, records):
+        """ Move the write_date, which does not change inside the test transaction """
+        records.flush_recordset()
+        self.env.cr.execute(
+            "UPDATE %s SET write_date = write_date + interval '1 second' WHERE id IN %%s" % records._table,
+            [tuple(records.ids)])
+        records.invalidate_recordset(['write_date'])
+
+    def _render(self, orders):
+        with patch.object(type(self.env['ir.actions.report']), '_run_wkhtmltopdf', return_value=PDF) as run:
+            streams = self.env['ir.actions.report']._render_qweb_pdf_prepare_streams(
+                self.report.report_name, {}, res_ids=orders.ids)
+        return {res_id: data['stream'].getvalue() for res_id, data in streams.items()}, run.call_count
+
+    def test_render_from_cache(self):
+        order = self.orders[0]
+        pdfs, renderings = self._render(order)
+        self.assertEqual((pdfs, renderings), ({order.id: PDF}, 1))
+        self.assertEqual(self.cache.search([('res_id', '=', order.id)]).file_size, len(PDF))
+
+        pdfs, renderings = self._render(order)
+        self.assertEqual((pdfs, renderings), ({order.id: PDF}, 0))
+
+        # a change of a printed related record renders the document again
+        self._touch(order.order_line.product_id)
+        self.assertEqual(self._render(order)[1], 1)
+
+    def test_get_and_store(self):
+        self.cache._store(self.report, self.orders, {order.id: PDF + bytes([order.id % 256]) for order in self.orders})
+        cached = self.cache._get(self.report, self.orders)
+        self.assertEqual(set(cached), set(self.orders.ids))
+        self.assertEqual(cached[self.orders[0].id], PDF + bytes([self.orders[0].id % 256]))
+
+        self._touch(self.orders[1])
+        self.assertEqual(set(self.cache._get(self.report, self.orders)), {self.orders[0].id})
+
+        self.cache._invalidate(res_model='sale.order', res_ids=self.orders[:1].ids)
+        self.assertFalse(self.cache._get(self.report, self.orders))
+
+    def test_cache_by_language(self):
+        self.env['res.lang']._activate_lang('id_ID')
+        order = self.orders[0]
+        self.cache.with_context(lang='en_US')._store(self.report, order, {order.id: PDF})
+        self.assertEqual(self.cache.with_context(lang='en_US')._get(self.report, order), {order.id: PDF})
+        self.assertFalse(self.cache.with_context(lang='id_ID')._get(self.report, order))
+
+        self.cache.with_context(lang='id_ID')._store(self.report, order, {order.id: PDF + b' id'})
+        self.assertEqual(self.cache.with_context(lang='id_ID')._get(self.report, order), {order.id: PDF + b' id'})
+        self.assertEqual(self.cache.with_context(lang='en_US')._get(self.report, order), {order.id: PDF})
+
+    def test_store_again(self):
+        order = self.orders[0]
+        self.cache._store(self.report, order, {order.id: PDF})
+        self._touch(order)
+        self.cache._store(self.report, order, {order.id: PDF + b' new'})
+        self.assertEqual(len(self.cache.search([('res_id', '=', order.id)])), 1)
+        self.assertEqual(self.cache._get(self.report, order), {order.id: PDF + b' new'})
+
+    def test_evict_least_recently_used(self):
+        self.env['ir.config_parameter'].sudo().set_param('lui_dpp.report_pdf_cache_size', 1)
+        big_pdf = PDF + b'0' * 600 * 1024
+        self.cache._store(self.report, self.orders[0], {self.orders[0].id: big_pdf})
+        self.cache._store(self.report, self.orders[1], {self.orders[1].id: big_pdf})
+        self.assertEqual(self.cache.search([]).mapped('res_id'), [self.orders[1].id])
+
+    def test_view_change(self):
+        invoice_report = self.env.ref('account.account_invoices')
+        self.cache._store(self.report, self.orders, {order.id: PDF for order in self.orders})
+        self.cache._store(invoice_report, self.orders[:1], {self.orders[0].id: PDF})
+
+        # a template of another report, or not used by reports, keeps the cache
+        self.env.ref('account.report_invoice_document').arch_db = self.env.ref(
+            'account.report_invoice_document').arch_db
+        self.assertEqual(self.cache.search([]).report_id, self.report)
+        self.env.ref('web.login').arch_db = self.env.ref('web.login').arch_db
+        self.assertEqual(len(self.cache.search([])), 2)
+
+        # an extension of the document template of the report drops its cache
+        self.env['ir.ui.view'].create({
+            'name': 'Sale order document extension',
+            'type': 'qweb',
+            'inherit_id': self.env.ref('sale.report_saleorder_document').id,
+            'arch': '<xpath expr="." position="inside"><span/></xpath>',
+        })
+        self.assertFalse(self.cache.search([]))
+
+    def test_company_layout_change(self):
+        self.cache._store(self.report, self.orders, {order.id: PDF for order in self.orders})
+        self.company_data['company'].fiscalyear_last_day = 30
+        self.assertEqual(len(self.cache.search([])), 2)
+        self.company_data['company'].phone = '+62 21 555 0100'
+        self.assertFalse(self.cache.search([]))
+        self.cache._store(self.report, self.orders, {order.id: PDF for order in self.orders})
+        self.report.action_clear_pdf_cache()
+        self.assertFalse(self.cache.search([]))
@@ -0,0 +1 @@
+from . import efaktur_export
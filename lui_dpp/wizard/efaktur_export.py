@@ -0,0 +1,28 @@
+from werkzeug.urls import url_encode
+
+from odoo import fields, models
+
+
+class EfakturExportWizard(models.TransientModel):
+    _name = 'dpp.efaktur.export.wizard'
+    _description = 'e-Faktur Tax Base Export'
+
+    date_from = fields.Date('Start Date', required=True,
+                            default=lambda self: fields.Date.today().replace(day=1))
+    date_to = fields.Date('End Date', required=True, default=fields.Date.today)
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+    file_format = fields.Selection([('csv', 'CSV'), ('xml', 'XML')], string='Format', required=True, default='csv')
+
+    def action_export(self):
+        self.ensure_one()
+        params = {
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+            'company_id': self.company_id.id,
+            'file_format': self.file_format,
+        }
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/lui_dpp/efaktur/export?%s' % url_encode(params),
+            'target': 'self',
+        }
@@ -0,0 +1,16 @@
+{
+    'name': 'Override Profiler',
+    'version': '16.0.1.0.0',
+    'category': 'Technical',
+    'summary': 'Call count, query count and time of the customised methods',
+    'author': 'Rizky',
+    'depends': ['base'],
+    'license': 'LGPL-3',
+    'data': [
+        'security/ir.model.access.csv',
+        'views/override_profiler_call_views.xml',
+    ],
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+}
@@ -0,0 +1,18 @@
+import json
+
+from odoo import http
+from odoo.http import request
+from odoo.tools import json_default
+
+
+class OverrideProfilerController(http.Controller):
+
+    @http.route('/override_profiler/export.json', type='http', auth='user')
+    def export_json(self, **kwargs):
+        calls = request.env['override.profiler.call'].export_json()
+        return request.make_response(
+            json.dumps(calls, default=json_default, indent=2),
+            headers=[
+                ('Content-Type', 'application/json'),
+                ('Content-Disposition', 'attachment; filename=override_profiler.json'),
+            ])
@@ -0,0 +1 @@
+from . import override_profiler_call
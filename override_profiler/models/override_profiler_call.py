@@ -0,0 +1,110 @@
+import functools
+import logging
+import time
+
+from odoo import api, fields, models
+from odoo.tools import str2bool
+
+_logger = logging.getLogger(__name__)
+
+# (model, method) overridden by the custom addons
+PROFILED_METHODS = [
+    ('stock.move', '_action_done'),
+    ('sale.order', '_get_invoice_status'),
+    ('sale.order', 'action_confirm'),
+    ('sale.order', 'onchange_partner_id'),
+    ('account.move', '_compute_amount_totals'),
+    ('account.move', '_compute_amount_residual'),
+]
+
+
+def _profiled(method, method_name):
+    """ Wrap a model method to record its calls when the profiler is enabled """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        calls = self.env['override.profiler.call']
+        if not calls._is_enabled():
+            return method(self, *args, **kwargs)
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        start = time.perf_counter()
+        res = method(self, *args, **kwargs)
+        calls._record(self._name, method_name, len(self),
+                      cr.sql_log_count - query_count,
+                      (time.perf_counter() - start) * 1000)
+        return res
+
+    wrapper._override_profiled = True
+    return wrapper
+
+
+class OverrideProfilerCall(models.Model):
+    _name = 'override.profiler.call'
+    _description = 'Profiled Call'
+    _order = 'duration desc'
+
+    slot = fields.Integer(required=True, readonly=True)
+    model = fields.Char(readonly=True, index=True)
+    method = fields.Char(readonly=True, index=True)
+    record_count = fields.Integer('Records', readonly=True)
+    query_count = fields.Integer('Queries', readonly=True)
+    duration = fields.Float('Duration (ms)', readonly=True)
+    call_date = fields.Datetime(readonly=True)
+
+    _sql_constraints = [
+        ('slot_uniq', 'unique(slot)', 'The ring buffer slot must be unique.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS override_profiler_call_seq")
+
+    def _register_hook(self):
+        super()._register_hook()
+        methods = list(PROFILED_METHODS)
+        # extra methods, as "model:method,model:method"
+        extra = self.env['ir.config_parameter'].sudo().get_param('override_profiler.methods', '')
+        methods += [tuple(item.strip().split(':', 1)) for item in extra.split(',') if ':' in item]
+        for model_name, method_name in methods:
+            if model_name not in self.env:
+                continue
+            cls = type(self.env[model_name])
+            method = getattr(cls, method_name, None)
+            if method is None or getattr(method, '_override_profiled', False):
+                continue
+            setattr(cls, method_name, _profiled(method, method_name))
+
+    @api.model
+    def _is_enabled(self):
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return str2bool(get_param('override_profiler.enabled', 'False'))
+
+    @api.model
+    def _record(self, model, method, record_count, query_count, duration):
+        """ Store the call in the next slot of the ring buffer, overwriting the oldest one """
+        size = int(self.env['ir.config_parameter'].sudo().get_param('override_profiler.size', 10000))
+        self.env.cr.execute("""
+            INSERT INTO override_profiler_call (slot, model, method, record_count, query_count, duration,
+                                                call_date, create_uid, create_date, write_uid, write_date)
+            VALUES (nextval('override_profiler_call_seq') %% %(size)s, %(model)s, %(method)s, %(record_count)s,
+                    %(query_count)s, %(duration)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC',
+                    %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (slot) DO UPDATE
+               SET model = EXCLUDED.model, method = EXCLUDED.method, record_count = EXCLUDED.record_count,
+                   query_count = EXCLUDED.query_count, duration = EXCLUDED.duration,
+                   call_date = EXCLUDED.call_date, write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+        """, {
+            'size': max(size, 1),
+            'model': model,
+            'method': method,
+            'record_count': record_count,
+            'query_count': query_count,
+            'duration': duration,
+            'uid': self.env.uid,
+        })
+
+    @api.model
+    def export_json(self, domain=None):
+        """ Profiled calls as a list of dicts, slowest first """
+        return self.search_read(domain or [], ['model', 'method', 'record_count', 'query_count',
+                                               'duration', 'call_date'])
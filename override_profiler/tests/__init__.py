@@ -0,0 +1 @@
+from . import test_override_profiler
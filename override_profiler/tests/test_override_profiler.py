@@ -0,0 +1,54 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestOverrideProfiler(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Call = cls.env['override.profiler.call']
+        cls.Call.search([]).unlink()
+        set_param = cls.env['ir.config_parameter'].sudo().set_param
+        set_param('override_profiler.methods', 'res.partner:address_get')
+        set_param('override_profiler.size', 3)
+        cls.partner = cls.env['res.partner'].create({'name': 'Profiled partner'})
+
+    def setUp(self):
+        super().setUp()
+        # the methods are wrapped on the registry classes, unwrap them after the test
+        cls = type(self.env['res.partner'])
+        if 'address_get' in vars(cls):
+            self.addCleanup(setattr, cls, 'address_get', vars(cls)['address_get'])
+        else:
+            self.addCleanup(delattr, cls, 'address_get')
+        self.Call._register_hook()
+
+    def _calls(self):
+        return self.Call.search([('model', '=', 'res.partner'), ('method', '=', 'address_get')])
+
+    def test_disabled(self):
+        self.partner.address_get()
+        self.assertFalse(self._calls())
+
+    def test_record_call(self):
+        self.env['ir.config_parameter'].sudo().set_param('override_profiler.enabled', True)
+        self.assertTrue(type(self.partner).address_get._override_profiled)
+        # registering again does not wrap the method twice
+        self.Call._register_hook()
+        self.partner.address_get()
+        call = self._calls()
+        self.assertEqual(len(call), 1)
+        self.assertEqual(call.record_count, 1)
+        self.assertGreaterEqual(call.duration, 0.0)
+        self.assertIn(call.slot, range(3))
+        self.assertEqual(self.Call.export_json([('id', '=', call.id)])[0]['method'], 'address_get')
+
+    def test_ring_buffer_wraparound(self):
+        self.env['ir.config_parameter'].sudo().set_param('override_profiler.enabled', True)
+        for _i in range(5):
+            self.partner.address_get()
+        calls = self.Call.search([])
+        # the oldest calls are overwritten, the buffer keeps its size
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sorted(calls.mapped('slot')), [0, 1, 2])
@@ -1,14 +1,19 @@
 {
     'name': 'Sale Discount',
-    'version': '16.0.1.1.1',
+    'version': '16.0.1.1.2',
     'author': '',
     'description':'',
     'depends': ['sale','account'],
     'data': [
+        'security/ir.model.access.csv',
+        'security/discount_fact_security.xml',
+        'data/ir_cron.xml',
         # 'views/res_config_view.xml',
+        # 'views/discount_approval_view.xml',
         'views/sale_view.xml',
         # 'views/account_invoice_view.xml',
         'views/invoice_report.xml',
+        'views/discount_fact_views.xml',
         # 'views/sale_order_report.xml',
     ],
     'application': True,
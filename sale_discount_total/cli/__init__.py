@@ -0,0 +1 @@
+from . import recompute_sale_amounts
@@ -0,0 +1,35 @@
+import argparse
+import ast
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+
+
+class RecomputeSaleAmounts(Command):
+    """ Recompute the stored totals of the sale orders, by chunks """
+
+    name = 'recompute_sale_amounts'
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f'{Path(sys.argv[0]).name} {self.name}',
+            description=self.__doc__)
+        parser.add_argument('-c', '--config', help='Odoo configuration file')
+        parser.add_argument('-d', '--database', required=True,
+                            help='Database name')
+        parser.add_argument('--domain', default='[]',
+                            help="Orders to recompute, e.g. "
+                                 "\"[('state', '=', 'sale')]\"")
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of orders per transaction')
+        args = parser.parse_args(cmdargs)
+
+        odoo.tools.config.parse_config(
+            ['-d', args.database] + (['-c', args.config] if args.config else []))
+        with odoo.registry(args.database).cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            env['sale.order']._recompute_amounts(
+                ast.literal_eval(args.domain), chunk_size=args.chunk_size,
+                commit=True)
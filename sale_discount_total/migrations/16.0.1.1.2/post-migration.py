@@ -0,0 +1,7 @@
+def migrate(cr, version):
+    """ The documents changed before the refresh queue existed were not
+    queued, rebuild the whole discount analysis at the next refresh """
+    if not version:
+        return
+    cr.execute("DELETE FROM ir_config_parameter WHERE key = %s",
+               ['sale_discount_total.discount_fact_refresh_date'])
@@ -1,3 +1,4 @@
 # from . import discount_approval
+from . import document_discount
 from . import sale
 from . import account_invoice
@@ -1,8 +1,21 @@
-from odoo import api, fields, models
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+# fields read by the discount analysis, their change queues the invoice
+DISCOUNT_FACT_INVOICE_FIELDS = {'state', 'move_type', 'invoice_date',
+                                'partner_id', 'company_id',
+                                'invoice_line_ids', 'line_ids'}
+DISCOUNT_FACT_LINE_FIELDS = {'move_id', 'product_id', 'quantity',
+                             'product_uom_id', 'price_unit', 'discount',
+                             'display_type', 'balance', 'amount_currency'}
 
 
 class AccountInvoice(models.Model):
-    _inherit = "account.move"
+    _name = "account.move"
+    _inherit = ["account.move", "document.discount.mixin"]
+
+    _discount_lines_field = 'invoice_line_ids'
+    _discount_quantity_field = 'quantity'
 
     discount_type = fields.Selection(
         [('percent', 'Percentage'), ('amount', 'Amount')],
@@ -15,35 +28,43 @@ class AccountInvoice(models.Model):
                                  states={'draft': [('readonly', False)],
                                          'sent': [('readonly', False)]})
     amount_discount = fields.Monetary(string='Discount', store=True,
-                                      compute='_compute_amount', readonly=True,
+                                      compute='_compute_amount_totals', readonly=True,
                                       track_visibility='always')
 
+    amount_untaxed = fields.Monetary(compute='_compute_amount_totals')
+    amount_tax = fields.Monetary(compute='_compute_amount_totals')
+    amount_total = fields.Monetary(compute='_compute_amount_totals')
+    amount_untaxed_signed = fields.Monetary(compute='_compute_amount_totals')
+    amount_tax_signed = fields.Monetary(compute='_compute_amount_totals')
+    amount_total_signed = fields.Monetary(compute='_compute_amount_totals')
+    amount_total_in_currency_signed = fields.Monetary(
+        compute='_compute_amount_totals')
+    amount_residual = fields.Monetary(compute='_compute_amount_residual')
+    amount_residual_signed = fields.Monetary(
+        compute='_compute_amount_residual')
+
     # def action_post(self):
     #     res = super(AccountInvoice, self).action_post()
     #     self.payment_state = "not_paid"
     #     return res
 
     @api.depends(
-        'line_ids.matched_debit_ids.debit_move_id.move_id.payment_id.is_matched',
-        'line_ids.matched_debit_ids.debit_move_id.move_id.line_ids.amount_residual',
-        'line_ids.matched_debit_ids.debit_move_id.move_id.line_ids.amount_residual_currency',
-        'line_ids.matched_credit_ids.credit_move_id.move_id.payment_id.is_matched',
-        'line_ids.matched_credit_ids.credit_move_id.move_id.line_ids.amount_residual',
-        'line_ids.matched_credit_ids.credit_move_id.move_id.line_ids.amount_residual_currency',
+        'move_type',
+        'line_ids.display_type',
+        'line_ids.tax_repartition_line_id',
         'line_ids.balance',
+        'line_ids.debit',
         'line_ids.currency_id',
         'line_ids.amount_currency',
-        'line_ids.amount_residual',
-        'line_ids.amount_residual_currency',
-        'line_ids.payment_id.state',
-        'line_ids.full_reconcile_id')
-    def _compute_amount(self):
+        'line_ids.quantity',
+        'line_ids.price_unit',
+        'line_ids.discount')
+    def _compute_amount_totals(self):
         for move in self:
             total_untaxed, total_untaxed_currency = 0.0, 0.0
             total_tax, total_tax_currency = 0.0, 0.0
-            total_residual, total_residual_currency = 0.0, 0.0
             total, total_currency = 0.0, 0.0
-            total_to_pay = move.amount_total
+            amount_discount = 0.0
 
             currencies = set()
             for line in move.line_ids:
@@ -63,10 +84,8 @@ class AccountInvoice(models.Model):
                         total_untaxed_currency += line.amount_currency
                         total += line.balance
                         total_currency += line.amount_currency
-                    elif line.display_type == 'payment_term':
-                        # Residual amount.
-                        total_residual += line.amount_residual
-                        total_residual_currency += line.amount_residual_currency
+                        amount_discount += (line.quantity * line.price_unit *
+                                            line.discount) / 100
                 else:
                     # === Miscellaneous journal entry ===
                     if line.debit:
@@ -79,83 +98,68 @@ class AccountInvoice(models.Model):
             move.amount_tax = sign * (
                 total_tax_currency if len(currencies) == 1 else total_tax)
             move.amount_total = sign * total_currency
-            move.amount_residual = -sign * total_residual_currency
             move.amount_untaxed_signed = -total_untaxed
             move.amount_tax_signed = -total_tax
             move.amount_total_signed = abs(
                 total) if move.move_type == 'entry' else -total
-            move.amount_residual_signed = total_residual
             move.amount_total_in_currency_signed = abs(
                 move.amount_total) if move.move_type == 'entry' else -(
                     sign * move.amount_total)
-            currency = len(
-                currencies) == 1 and currencies.pop() or move.company_id.currency_id
-
-            new_pmt_state = 'not_paid' if move.move_type != 'entry' else False
-
-            if move.is_invoice(
-                    include_receipts=True) and move.state == 'posted':
-                if currency.is_zero(move.amount_residual):
-                    if all(payment.is_matched for payment in
-                           move._get_reconciled_payments()):
-                        new_pmt_state = 'paid'
-                    else:
-                        new_pmt_state = move._get_invoice_in_payment_state()
-                elif currency.compare_amounts(total_to_pay,
-                                              abs(total_residual)) != 0:
-                    new_pmt_state = 'partial'
-
-            if new_pmt_state == 'paid' and move.move_type in (
-                    'in_invoice', 'out_invoice', 'entry'):
-                reverse_type = move.move_type == 'in_invoice' and 'in_refund' or move.move_type == 'out_invoice' and 'out_refund' or 'entry'
-                reverse_moves = self.env['account.move'].search(
-                    [('reversed_entry_id', '=', move.id),
-                     ('state', '=', 'posted'),
-                     ('move_type', '=', reverse_type)])
-
-                # We only set 'reversed' state in case of 1 to 1 full
-                # reconciliation with a reverse entry; otherwise, we use the
-                # regular 'paid' state
-                reverse_moves_full_recs = reverse_moves.mapped(
-                    'line_ids.full_reconcile_id')
-                if reverse_moves_full_recs.mapped(
-                        'reconciled_line_ids.move_id').filtered(
-                    lambda x: x not in (
-                            reverse_moves + reverse_moves_full_recs.mapped(
-                        'exchange_move_id'))) == move:
-                    new_pmt_state = 'reversed'
-
-            move.payment_state = new_pmt_state
+            move.amount_discount = amount_discount
+
+    @api.depends(
+        'move_type',
+        'line_ids.display_type',
+        'line_ids.amount_residual',
+        'line_ids.amount_residual_currency')
+    def _compute_amount_residual(self):
+        for move in self:
+            total_residual, total_residual_currency = 0.0, 0.0
+            if move.is_invoice(True):
+                for line in move.line_ids:
+                    if line.display_type == 'payment_term':
+                        total_residual += line.amount_residual
+                        total_residual_currency += line.amount_residual_currency
+            move.amount_residual = -move.direction_sign * total_residual_currency
+            move.amount_residual_signed = total_residual
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super(AccountInvoice, self).create(vals_list)
+        # drafts are queued when posted, unless created posted
+        moves.filtered(lambda m: m.state == 'posted')._enqueue_discount_fact()
+        return moves
+
+    def write(self, vals):
+        res = super(AccountInvoice, self).write(vals)
+        if DISCOUNT_FACT_INVOICE_FIELDS.intersection(vals):
+            self._enqueue_discount_fact()
+        return res
+
+    def unlink(self):
+        self._enqueue_discount_fact()
+        return super(AccountInvoice, self).unlink()
+
+    def _enqueue_discount_fact(self):
+        invoices = self.filtered(
+            lambda m: m.move_type in ('out_invoice', 'out_refund'))
+        self.env['discount.fact.queue']._enqueue('invoice', invoices.ids)
+
+    def _check_document_discount_editable(self):
+        if any(move.state != 'draft' for move in self):
+            raise UserError(_("The discount can only be applied on draft "
+                              "invoices."))
 
     @api.onchange('discount_type', 'discount_rate', 'invoice_line_ids')
     def _supply_rate(self):
         for inv in self:
-            if inv.discount_type == 'percent' and inv.discount_rate > 0:
-                discount_totals = 0
-                for line in inv.invoice_line_ids:
-                    line.discount = inv.discount_rate
-                    total_price = line.price_unit * line.quantity
-                    discount_total = total_price - line.price_subtotal
-                    discount_totals = discount_totals + discount_total
-                    inv.amount_discount = discount_totals
-                    line._compute_totals()
-            elif inv.discount_rate > 0:
-                total = discount = 0.0
-                for line in inv.invoice_line_ids:
-                    total += (line.quantity * line.price_unit)
-                if inv.discount_rate != 0:
-                    discount = (inv.discount_rate / total) * 100
-                else:
-                    discount = inv.discount_rate
-                for line in inv.invoice_line_ids:
-                    line.discount = discount
-                    inv.amount_discount = inv.discount_rate
-                    line._compute_totals()
-
-            inv._compute_tax_totals()
+            discounts = inv._get_document_discounts()
+            for line in inv.invoice_line_ids:
+                if line.id in discounts:
+                    line.discount = discounts[line.id]
 
     def button_dummy(self):
-        self.supply_rate()
+        self.apply_document_discount()
         return True
 
 
@@ -163,3 +167,17 @@ class AccountInvoiceLine(models.Model):
     _inherit = "account.move.line"
 
     discount = fields.Float(string='Discount (%)', digits=(16, 20), default=0.0)
+
+    def write(self, vals):
+        if 'move_id' in vals:
+            self._enqueue_discount_fact()
+        res = super(AccountInvoiceLine, self).write(vals)
+        if DISCOUNT_FACT_LINE_FIELDS.intersection(vals):
+            self._enqueue_discount_fact()
+        return res
+
+    def _enqueue_discount_fact(self):
+        # the lines of posted invoices only change with the invoice state or
+        # by a direct write, the others are not in the analysis
+        moves = self.move_id.filtered(lambda m: m.state == 'posted')
+        moves._enqueue_discount_fact()
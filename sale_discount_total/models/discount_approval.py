@@ -4,31 +4,43 @@ from odoo import api, fields, models
 class sale_discount(models.Model):
     _inherit = 'sale.order'
 
-    state = fields.Selection([
-        ('draft', 'Quotation'),
-        ('sent', 'Quotation Sent'),
-        ('waiting', 'Waiting Approval'),
-        ('sale', 'Sales Order'),
-        ('done', 'Locked'),
-        ('cancel', 'Cancelled'),
-    ], string='Status', readonly=True, copy=False, index=True,
-        track_visibility='onchange', default='draft')
+    state = fields.Selection(
+        selection_add=[('waiting', 'Waiting Approval'), ('sale',)],
+        ondelete={'waiting': 'set default'})
+
+    def _get_orders_to_approve(self):
+        """ Orders of two steps companies whose average line discount is over
+        the company limit, with the averages computed in one query """
+        orders = self.filtered(
+            lambda o: o.company_id.so_double_validation == 'two_step'
+            and o.company_id.so_double_validation_limit)
+        if not orders:
+            return orders
+        self.env['sale.order.line'].flush_model(['order_id', 'discount'])
+        self.env.cr.execute("""
+            SELECT order_id, avg(discount)
+              FROM sale_order_line
+             WHERE order_id IN %s
+             GROUP BY order_id
+        """, [tuple(orders.ids)])
+        discounts = dict(self.env.cr.fetchall())
+        return orders.filtered(
+            lambda o: discounts.get(o.id, 0.0) >
+            o.company_id.so_double_validation_limit)
 
     def action_confirm(self):
-        discnt = 0.0
-        no_line = 0.0
-        if self.company_id.so_double_validation == 'two_step':
-            for line in self.order_line:
-                no_line += 1
-                discnt += line.discount
-            discnt = (discnt / no_line)
-            if self.company_id.so_double_validation_limit and discnt > self.company_id.so_double_validation_limit:
-                self.state = 'waiting'
-                return True
-        super(sale_discount, self).action_confirm()
+        to_approve = self._get_orders_to_approve()
+        if to_approve:
+            to_approve.write({'state': 'waiting'})
+        to_confirm = self - to_approve
+        if to_confirm:
+            return super(sale_discount, to_confirm).action_confirm()
+        return True
 
     def action_approve(self):
-        super(sale_discount, self).action_confirm()
+        orders = self.filtered(lambda o: o.state == 'waiting')
+        if orders:
+            super(sale_discount, orders).action_confirm()
         return True
 
 
@@ -0,0 +1,75 @@
+from odoo import models
+
+
+class DocumentDiscountMixin(models.AbstractModel):
+    _name = 'document.discount.mixin'
+    _description = 'Document Discount'
+
+    # one2many field of the lines and quantity field of a line
+    _discount_lines_field = 'order_line'
+    _discount_quantity_field = 'product_uom_qty'
+
+    def _get_discount_line_fields(self):
+        """ Name of the one2many field of the lines and of the line
+        quantity field """
+        return self._discount_lines_field, self._discount_quantity_field
+
+    def _check_document_discount_editable(self):
+        """ Raise if the lines of the documents can not be changed """
+
+    def _get_document_discounts(self):
+        """ Discount percentage of each line of the document.
+
+        In amount mode the discount is split in proportion to the line
+        amounts, rounded in the document currency; the rounding residue
+        goes to the largest line (the first one on equal amounts).
+
+        :return: dict {line id: discount percentage}, empty when there is
+            no discount to apply
+        """
+        self.ensure_one()
+        if self.discount_rate <= 0:
+            return {}
+        lines_field, quantity_field = self._get_discount_line_fields()
+        lines = self[lines_field]
+        if self.discount_type == 'percent':
+            return dict.fromkeys(lines.ids, self.discount_rate)
+
+        gross = [(line, line[quantity_field] * line.price_unit)
+                 for line in lines]
+        total = sum(amount for _line, amount in gross)
+        if not total:
+            return dict.fromkeys(lines.ids, 0.0)
+        shares = [self.currency_id.round(self.discount_rate * amount / total)
+                  for _line, amount in gross]
+        largest = max(range(len(gross)),
+                      key=lambda index: (gross[index][1], -index))
+        shares[largest] += self.discount_rate - sum(shares)
+        return {
+            line.id: (share / amount * 100) if amount else 0.0
+            for (line, amount), share in zip(gross, shares)
+        }
+
+    def apply_document_discount(self, discount_type=None,
+                                discount_rate=None):
+        """ Apply the document discount on the lines, with one write per
+        document so the totals are computed once. Callable over RPC; the
+        discount type and rate can be given to set them at the same time.
+        """
+        self._check_document_discount_editable()
+        vals = {}
+        if discount_type is not None:
+            vals['discount_type'] = discount_type
+        if discount_rate is not None:
+            vals['discount_rate'] = discount_rate
+        if vals:
+            self.write(vals)
+        lines_field = self._get_discount_line_fields()[0]
+        for document in self:
+            discounts = document._get_document_discounts()
+            if discounts:
+                document.write({lines_field: [
+                    (1, line_id, {'discount': discount})
+                    for line_id, discount in discounts.items()
+                ]})
+        return True
@@ -1,10 +1,23 @@
+import logging
+
 from odoo import api, fields, models, _
 import odoo.addons.decimal_precision as dp
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+# fields read by the discount analysis, their change queues the order
+DISCOUNT_FACT_ORDER_FIELDS = {'state', 'date_order', 'partner_id',
+                              'company_id', 'pricelist_id', 'order_line'}
+DISCOUNT_FACT_LINE_FIELDS = {'order_id', 'product_id', 'product_uom_qty',
+                             'product_uom', 'price_unit', 'discount',
+                             'display_type'}
 
 
 class SaleOrder(models.Model):
-    _inherit = "sale.order"
+    _name = "sale.order"
+    _inherit = ["sale.order", "document.discount.mixin"]
 
 
     type_discount_print = fields.Selection(
@@ -15,19 +28,41 @@ class SaleOrder(models.Model):
     @api.depends('order_line.price_total')
     def _amount_all(self):
         """ Compute the total amounts of the SO. """
+        # read the lines of all the orders at once and sum them in one pass
+        totals = {order.id: [0.0, 0.0, 0.0] for order in self}
+        for line in self.order_line:
+            order_totals = totals[line.order_id.id]
+            order_totals[0] += line.price_subtotal
+            order_totals[1] += line.price_tax
+            order_totals[2] += (line.product_uom_qty *
+                                line.price_unit * line.discount)/100
         for order in self:
-            amount_untaxed = amount_tax = amount_discount = 0.0
-            for line in order.order_line:
-                amount_untaxed += line.price_subtotal
-                amount_tax += line.price_tax
-                amount_discount += (line.product_uom_qty *
-                                    line.price_unit * line.discount)/100
-            order.update({
-                'amount_untaxed': amount_untaxed,
-                'amount_tax': amount_tax,
-                'amount_discount': amount_discount,
-                'amount_total': amount_untaxed + amount_tax,
-            })
+            amount_untaxed, amount_tax, amount_discount = totals[order.id]
+            order.amount_untaxed = amount_untaxed
+            order.amount_tax = amount_tax
+            order.amount_discount = amount_discount
+            order.amount_total = amount_untaxed + amount_tax
+
+    @api.model
+    def _recompute_amounts(self, domain=None, chunk_size=1000, commit=False):
+        """ Recompute the stored totals of the orders matching the domain,
+        by chunks """
+        fnames = ['amount_untaxed', 'amount_tax', 'amount_discount',
+                  'amount_total']
+        order_ids = self.search(domain or []).ids
+        done = 0
+        for chunk_ids in split_every(chunk_size, order_ids):
+            orders = self.browse(chunk_ids)
+            for fname in fnames:
+                self.env.add_to_compute(self._fields[fname], orders)
+            orders.flush_recordset(fnames)
+            if commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+            self.env.invalidate_all()
+            done += len(chunk_ids)
+            _logger.info("Sale order totals recomputed: %s/%s", done,
+                         len(order_ids))
+        return True
 
     discount_type = fields.Selection(
         [('percent', 'Percentage'), ('amount', 'Amount')],
@@ -54,24 +89,43 @@ class SaleOrder(models.Model):
                                       digits=dp.get_precision('Account'),
                                       track_visibility='always')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super(SaleOrder, self).create(vals_list)
+        # new orders are quotations, queued when confirmed, unless imported
+        orders.filtered(
+            lambda o: o.state in ('sale', 'done'))._enqueue_discount_fact()
+        return orders
+
+    def write(self, vals):
+        res = super(SaleOrder, self).write(vals)
+        if DISCOUNT_FACT_ORDER_FIELDS.intersection(vals):
+            self._enqueue_discount_fact()
+        return res
+
+    def unlink(self):
+        self._enqueue_discount_fact()
+        return super(SaleOrder, self).unlink()
+
+    def _enqueue_discount_fact(self):
+        self.env['discount.fact.queue']._enqueue('sale', self.ids)
+
+    def _check_document_discount_editable(self):
+        if any(order.state not in ('draft', 'sent') for order in self):
+            raise UserError(_("The discount can only be applied on "
+                              "quotations."))
+
     @api.onchange('discount_type', 'discount_rate', 'order_line')
     def supply_rate(self):
         """supply discount into order line"""
         for order in self:
-            if order.discount_type == 'percent' and order.discount_rate > 0:
-                for line in order.order_line:
-                    line.discount = order.discount_rate
-            elif order.discount_rate > 0:
-                total = discount = 0.0
-                for line in order.order_line:
-                    total += (line.product_uom_qty * line.price_unit)
-                if order.discount_rate != 0:
-                    discount = (order.discount_rate / total) * 100
-                else:
-                    discount = order.discount_rate
-                for line in order.order_line:
-                    line.discount = discount
-                    new_sub_price = (line.price_unit * (discount / 100))
+            discounts = order._get_document_discounts()
+            for line in order.order_line:
+                if line.id not in discounts:
+                    continue
+                line.discount = discounts[line.id]
+                if order.discount_type != 'percent':
+                    new_sub_price = (line.price_unit * (line.discount / 100))
                     line.total_discount = line.price_unit - new_sub_price
 
     def _prepare_invoice(self, ):
@@ -85,7 +139,7 @@ class SaleOrder(models.Model):
 
     def button_dummy(self):
 
-        self.supply_rate()
+        self.apply_document_discount()
         return True
 
     # def write(self, vals):
@@ -114,3 +168,26 @@ class SaleOrderLine(models.Model):
     discount = fields.Float(string='Discount (%)', digits=(16, 20), default=0.0)
     total_discount = fields.Float(string="Total Discount", default=0.0,
                                   store=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(SaleOrderLine, self).create(vals_list)
+        lines._enqueue_discount_fact()
+        return lines
+
+    def write(self, vals):
+        if 'order_id' in vals:
+            self._enqueue_discount_fact()
+        res = super(SaleOrderLine, self).write(vals)
+        if DISCOUNT_FACT_LINE_FIELDS.intersection(vals):
+            self._enqueue_discount_fact()
+        return res
+
+    def unlink(self):
+        self._enqueue_discount_fact()
+        return super(SaleOrderLine, self).unlink()
+
+    def _enqueue_discount_fact(self):
+        # only the confirmed orders are in the analysis
+        orders = self.order_id.filtered(lambda o: o.state in ('sale', 'done'))
+        orders._enqueue_discount_fact()
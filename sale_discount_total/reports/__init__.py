@@ -1,2 +1,3 @@
 from . import invoice_report
 from . import sale_report
+from . import discount_fact
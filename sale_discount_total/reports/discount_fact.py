@@ -0,0 +1,225 @@
+import logging
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+REFRESH_PARAM = 'sale_discount_total.discount_fact_refresh_date'
+
+SOURCES = [('sale', 'Sales Order'), ('invoice', 'Invoice')]
+
+SALE_DOCUMENT_QUERY = """
+    SELECT 'sale', s.id, s.date_order::date, l.product_id, s.partner_id,
+           s.company_id,
+           sum(l.product_uom_qty / u.factor * u2.factor),
+           sum(l.product_uom_qty * l.price_unit
+               / COALESCE(NULLIF(s.currency_rate, 0), 1)),
+           sum(l.product_uom_qty * l.price_unit * l.discount / 100.0
+               / COALESCE(NULLIF(s.currency_rate, 0), 1))
+      FROM sale_order_line l
+      JOIN sale_order s ON s.id = l.order_id
+      JOIN product_product p ON p.id = l.product_id
+      JOIN product_template t ON t.id = p.product_tmpl_id
+      JOIN uom_uom u ON u.id = l.product_uom
+      JOIN uom_uom u2 ON u2.id = t.uom_id
+     WHERE s.id IN (SELECT res_id FROM discount_fact_changed
+                     WHERE source = 'sale')
+       AND s.state IN ('sale', 'done')
+       AND l.display_type IS NULL
+     GROUP BY s.id, s.date_order::date, l.product_id, s.partner_id,
+              s.company_id
+"""
+
+INVOICE_DOCUMENT_QUERY = """
+    SELECT 'invoice', m.id, m.invoice_date, l.product_id, m.partner_id,
+           m.company_id,
+           sum(sign.value * l.quantity
+               * COALESCE(u2.factor / NULLIF(u.factor, 0), 1)),
+           sum(sign.value * l.quantity * l.price_unit * rate.value),
+           sum(sign.value * l.quantity * l.price_unit * l.discount / 100.0
+               * rate.value)
+      FROM account_move_line l
+      JOIN account_move m ON m.id = l.move_id
+      JOIN product_product p ON p.id = l.product_id
+      JOIN product_template t ON t.id = p.product_tmpl_id
+      LEFT JOIN uom_uom u ON u.id = l.product_uom_id
+      LEFT JOIN uom_uom u2 ON u2.id = t.uom_id
+     CROSS JOIN LATERAL (
+           SELECT CASE WHEN m.move_type = 'out_refund' THEN -1 ELSE 1 END
+           AS value) sign
+     CROSS JOIN LATERAL (
+           SELECT COALESCE(ABS(l.balance) / NULLIF(ABS(l.amount_currency), 0), 1)
+           AS value) rate
+     WHERE m.id IN (SELECT res_id FROM discount_fact_changed
+                     WHERE source = 'invoice')
+       AND m.state = 'posted'
+       AND m.move_type IN ('out_invoice', 'out_refund')
+       AND l.display_type = 'product'
+     GROUP BY m.id, m.invoice_date, l.product_id, m.partner_id, m.company_id
+"""
+
+FACT_KEY = """
+    f.source = k.source AND f.date IS NOT DISTINCT FROM k.date
+    AND f.product_id = k.product_id
+    AND f.partner_id IS NOT DISTINCT FROM k.partner_id
+    AND f.company_id = k.company_id
+"""
+
+
+class DiscountFactQueue(models.Model):
+    """ Orders and invoices changed since the last refresh, queued by their
+    create, write and unlink so the refresh does not scan the line tables """
+    _name = 'discount.fact.queue'
+    _description = 'Discount Analysis Changed Document'
+    _log_access = False
+
+    source = fields.Selection(SOURCES, required=True, readonly=True)
+    res_id = fields.Integer('Document', required=True, readonly=True)
+
+    @api.model
+    def _enqueue(self, source, res_ids):
+        """ Queue the documents for the next refresh, with one INSERT """
+        res_ids = [res_id for res_id in res_ids if isinstance(res_id, int)]
+        if res_ids:
+            self.env.cr.execute("""
+                INSERT INTO discount_fact_queue (source, res_id)
+                SELECT %s, unnest(%s)
+            """, [source, res_ids])
+
+
+class DiscountFactDocument(models.Model):
+    """ Discount figures of each document at the grain of the analysis,
+    kept to know which analysis rows a changed document contributed to """
+    _name = 'discount.fact.document'
+    _description = 'Discount Analysis by Document'
+    _log_access = False
+
+    source = fields.Selection(SOURCES, required=True, readonly=True)
+    res_id = fields.Integer('Document', required=True, readonly=True)
+    date = fields.Date(readonly=True)
+    product_id = fields.Many2one('product.product', readonly=True)
+    partner_id = fields.Many2one('res.partner', readonly=True)
+    company_id = fields.Many2one('res.company', readonly=True)
+    quantity = fields.Float(readonly=True)
+    amount_gross = fields.Float(readonly=True)
+    amount_discount = fields.Float(readonly=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'discount_fact_document_res_id_index',
+                           self._table, ['res_id', 'source'])
+
+
+class DiscountFact(models.Model):
+    """ Discount by day, product, partner and company, refreshed
+    incrementally from the orders and invoices changed since the last
+    refresh """
+    _name = 'discount.fact'
+    _description = 'Discount Analysis'
+    _order = 'date desc'
+    _log_access = False
+
+    source = fields.Selection(SOURCES, required=True, readonly=True)
+    date = fields.Date(readonly=True)
+    product_id = fields.Many2one('product.product', readonly=True)
+    product_tmpl_id = fields.Many2one(related='product_id.product_tmpl_id')
+    partner_id = fields.Many2one('res.partner', readonly=True)
+    company_id = fields.Many2one('res.company', readonly=True)
+    currency_id = fields.Many2one(related='company_id.currency_id')
+    quantity = fields.Float(readonly=True)
+    amount_gross = fields.Monetary('Gross Amount', readonly=True)
+    amount_discount = fields.Monetary('Discount', readonly=True)
+
+    def init(self):
+        tools.create_index(
+            self._cr, 'discount_fact_key_index', self._table,
+            ['date', 'product_id', 'partner_id', 'company_id', 'source'])
+
+    @api.model
+    def _refresh(self, full=False):
+        """ Rebuild the analysis rows of the documents queued as changed or
+        deleted since the last refresh, or of all the documents when full is
+        set """
+        cr = self.env.cr
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        since = False if full else get_param(REFRESH_PARAM)
+        self.env.flush_all()
+        cr.execute("SELECT now() at time zone 'UTC'")
+        refresh_date = cr.fetchone()[0]
+
+        cr.execute("""
+            DROP TABLE IF EXISTS discount_fact_changed;
+            CREATE TEMP TABLE discount_fact_changed
+                (source varchar, res_id integer) ON COMMIT DROP;
+            DROP TABLE IF EXISTS discount_fact_keys;
+            CREATE TEMP TABLE discount_fact_keys
+                (source varchar, date date, product_id integer,
+                 partner_id integer, company_id integer) ON COMMIT DROP;
+        """)
+        # the queued documents are taken in both modes, the ones queued by
+        # transactions still running stay for the next refresh
+        cr.execute("""
+            WITH queued AS (DELETE FROM discount_fact_queue
+                            RETURNING source, res_id)
+            INSERT INTO discount_fact_changed
+            SELECT DISTINCT source, res_id FROM queued
+        """)
+        if not since:
+            cr.execute("""
+                TRUNCATE discount_fact_document, discount_fact, discount_fact_changed;
+                INSERT INTO discount_fact_changed
+                SELECT 'sale', id FROM sale_order
+                 UNION ALL
+                SELECT 'invoice', id FROM account_move
+                 WHERE move_type IN ('out_invoice', 'out_refund');
+            """)
+
+        # analysis rows touched by the changed documents, before and after
+        cr.execute("""
+            INSERT INTO discount_fact_keys
+            SELECT d.source, d.date, d.product_id, d.partner_id, d.company_id
+              FROM discount_fact_document d
+              JOIN discount_fact_changed c
+                ON c.source = d.source AND c.res_id = d.res_id;
+
+            DELETE FROM discount_fact_document d
+             USING discount_fact_changed c
+             WHERE c.source = d.source AND c.res_id = d.res_id;
+
+            INSERT INTO discount_fact_document
+                (source, res_id, date, product_id, partner_id, company_id,
+                 quantity, amount_gross, amount_discount)
+            {sale} UNION ALL {invoice};
+
+            INSERT INTO discount_fact_keys
+            SELECT d.source, d.date, d.product_id, d.partner_id, d.company_id
+              FROM discount_fact_document d
+              JOIN discount_fact_changed c
+                ON c.source = d.source AND c.res_id = d.res_id;
+
+            DELETE FROM discount_fact f
+             USING (SELECT DISTINCT * FROM discount_fact_keys) k
+             WHERE {key};
+
+            INSERT INTO discount_fact
+                (source, date, product_id, partner_id, company_id,
+                 quantity, amount_gross, amount_discount)
+            SELECT f.source, f.date, f.product_id, f.partner_id, f.company_id,
+                   sum(f.quantity), sum(f.amount_gross),
+                   sum(f.amount_discount)
+              FROM discount_fact_document f
+              JOIN (SELECT DISTINCT * FROM discount_fact_keys) k ON {key}
+             GROUP BY f.source, f.date, f.product_id, f.partner_id,
+                      f.company_id;
+        """.format(sale=SALE_DOCUMENT_QUERY, invoice=INVOICE_DOCUMENT_QUERY,
+                   key=FACT_KEY))
+        _logger.info("Discount analysis refreshed: %s rows", cr.rowcount)
+
+        self.env['ir.config_parameter'].sudo().set_param(
+            REFRESH_PARAM, fields.Datetime.to_string(refresh_date))
+        self.invalidate_model()
+        self.env['discount.fact.document'].invalidate_model()
+        return True
+
+    @api.model
+    def _cron_refresh(self):
+        self._refresh()
@@ -0,0 +1,3 @@
+from . import test_payment_state
+from . import test_document_discount
+from . import test_discount_fact
@@ -0,0 +1,68 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestDiscountFact(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Discount customer'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Discounted product',
+            'list_price': 100.0,
+        })
+
+    def _create_order(self, prices):
+        return self.env['sale.order'].create({
+            'partner_id': self.partner.id,
+            'order_line': [(0, 0, {
+                'product_id': self.product.id,
+                'product_uom_qty': 1.0,
+                'price_unit': price,
+            }) for price in prices],
+        })
+
+    def test_discount_fact_refresh(self):
+        order = self._create_order([100.0, 300.0])
+        order.apply_document_discount('amount', 40.0)
+        order.action_confirm()
+        Fact = self.env['discount.fact']
+        domain = [('source', '=', 'sale'), ('product_id', '=', self.product.id)]
+
+        Fact._refresh(full=True)
+        fact = Fact.search(domain)
+        self.assertEqual(len(fact), 1)
+        self.assertAlmostEqual(fact.quantity, 2.0)
+        self.assertAlmostEqual(fact.amount_gross, 400.0)
+        self.assertAlmostEqual(fact.amount_discount, 40.0)
+
+        # a cancelled and deleted order leaves the analysis on the next refresh
+        order._action_cancel()
+        order.unlink()
+        Fact._refresh()
+        self.assertFalse(Fact.search(domain))
+        self.assertFalse(self.env['discount.fact.document'].search([
+            ('source', '=', 'sale'), ('res_id', '=', order.id)]))
+
+    def test_refresh_queued_documents(self):
+        order = self._create_order([100.0])
+        Fact = self.env['discount.fact']
+        Queue = self.env['discount.fact.queue']
+        Fact._refresh(full=True)
+        self.assertFalse(Queue.search([]))
+
+        # a quotation is not queued, its confirmation is
+        order.order_line.price_unit = 200.0
+        self.assertFalse(Queue.search([]))
+        order.action_confirm()
+        self.assertEqual(set(Queue.search([]).mapped('res_id')), set(order.ids))
+        Fact._refresh()
+        self.assertFalse(Queue.search([]))
+        domain = [('source', '=', 'sale'), ('product_id', '=', self.product.id)]
+        self.assertAlmostEqual(Fact.search(domain).amount_gross, 200.0)
+
+        order.order_line.discount = 10.0
+        self.assertTrue(Queue.search([('source', '=', 'sale'), ('res_id', '=', order.id)]))
+        Fact._refresh()
+        self.assertAlmostEqual(Fact.search(domain).amount_discount, 20.0)
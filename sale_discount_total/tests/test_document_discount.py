@@ -0,0 +1,85 @@
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentDiscount(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Discount customer'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Discounted product',
+            'list_price': 100.0,
+        })
+
+    def _create_order(self, prices):
+        return self.env['sale.order'].create({
+            'partner_id': self.partner.id,
+            'order_line': [(0, 0, {
+                'product_id': self.product.id,
+                'product_uom_qty': 1.0,
+                'price_unit': price,
+            }) for price in prices],
+        })
+
+    def _line_discounts(self, order):
+        return [order.currency_id.round(line.price_unit * line.discount / 100)
+                for line in order.order_line.sorted('id')]
+
+    def test_percent_discount(self):
+        order = self._create_order([100.0, 300.0])
+        order.apply_document_discount('percent', 5.0)
+        self.assertEqual(order.order_line.mapped('discount'), [5.0, 5.0])
+        self.assertAlmostEqual(order.amount_discount, 20.0)
+        self.assertAlmostEqual(order.amount_untaxed, 380.0)
+
+    def test_amount_discount_split(self):
+        order = self._create_order([100.0, 300.0])
+        order.apply_document_discount('amount', 40.0)
+        self.assertEqual(self._line_discounts(order), [10.0, 30.0])
+        self.assertAlmostEqual(order.amount_discount, 40.0)
+
+    def test_amount_discount_residue(self):
+        order = self._create_order([100.0, 100.0, 100.0])
+        order.apply_document_discount('amount', 10.0)
+        # the rounding residue goes to the first of the largest lines
+        self.assertEqual(self._line_discounts(order), [3.34, 3.33, 3.33])
+        self.assertAlmostEqual(order.amount_discount, 10.0)
+
+    def test_no_discount(self):
+        order = self._create_order([100.0])
+        order.discount_rate = 0.0
+        self.assertEqual(order._get_document_discounts(), {})
+        order = self._create_order([0.0, 0.0])
+        order.write({'discount_type': 'amount', 'discount_rate': 10.0})
+        self.assertEqual(set(order._get_document_discounts().values()), {0.0})
+
+    def test_confirmed_order_not_editable(self):
+        order = self._create_order([100.0])
+        order.action_confirm()
+        with self.assertRaises(UserError):
+            order.apply_document_discount('percent', 10.0)
+        self.assertEqual(order.discount_rate, 0.0)
+        self.assertEqual(order.order_line.discount, 0.0)
+
+
+@tagged('post_install', '-at_install')
+class TestInvoiceDocumentDiscount(AccountTestInvoicingCommon):
+
+    def test_invoice_amount_discount(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0, 300.0])
+        invoice.apply_document_discount('amount', 40.0)
+        lines = invoice.invoice_line_ids.sorted('id')
+        self.assertEqual(
+            [invoice.currency_id.round(line.price_unit * line.discount / 100)
+             for line in lines], [10.0, 30.0])
+        self.assertAlmostEqual(invoice.amount_untaxed, 360.0)
+
+    def test_posted_invoice_not_editable(self):
+        invoice = self.init_invoice('out_invoice', amounts=[100.0], post=True)
+        with self.assertRaises(UserError):
+            invoice.apply_document_discount('percent', 10.0)
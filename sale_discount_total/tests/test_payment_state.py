@@ -0,0 +1,29 @@
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentState(AccountTestInvoicingCommon):
+
+    def _pay(self, invoice):
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids,
+        ).create({})._create_payments()
+
+    def test_payment_state_follows_posting(self):
+        invoice = self.init_invoice('out_invoice', products=self.product_a)
+        self.assertEqual(invoice.payment_state, 'not_paid')
+        invoice.action_post()
+        self.assertEqual(invoice.payment_state, 'not_paid')
+
+        self._pay(invoice)
+        self.assertIn(invoice.payment_state, ('paid', 'in_payment'))
+
+        invoice.button_draft()
+        self.assertEqual(invoice.payment_state, 'not_paid')
+
+    def test_payment_state_reversed(self):
+        invoice = self.init_invoice('out_invoice', products=self.product_a, post=True)
+        invoice._reverse_moves(cancel=True)
+        self.assertEqual(invoice.payment_state, 'reversed')
@@ -0,0 +1,21 @@
+{
+    'name': 'Sale Order XLSX Export',
+    'version': '16.0.1.0.0',
+    'category': 'Sales',
+    'summary': 'Streaming XLSX export of orders with discount, DPP and payment columns',
+    'author': 'Rizky',
+    'depends': ['sale_discount_total', 'lui_dpp', 'state_payment', 'description'],
+    'external_dependencies': {'python': ['xlsxwriter']},
+    'license': 'LGPL-3',
+    'data': [
+        'security/ir.model.access.csv',
+        'security/sale_order_export_security.xml',
+        'data/sale_order_export_preset_data.xml',
+        'data/ir_cron.xml',
+        'views/sale_order_export_views.xml',
+        'wizard/sale_order_export_wizard_view.xml',
+    ],
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+}
@@ -0,0 +1,2 @@
+from . import sale_order_export_preset
+from . import sale_order_export_job
@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+import xlsxwriter
+
+from odoo import _, api, fields, models
+from odoo.tools.safe_eval import safe_eval
+
+_logger = logging.getLogger(__name__)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# hours after which a job still running is considered interrupted (worker killed, server restarted)
+DEFAULT_JOB_TIMEOUT = 4
+
+
+class SaleOrderExportJob(models.Model):
+    _name = 'sale.order.export.job'
+    _description = 'Sale Order XLSX Export'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, readonly=True)
+    user_id = fields.Many2one('res.users', required=True, readonly=True, default=lambda self: self.env.user)
+    company_ids = fields.Many2many('res.company', readonly=True, default=lambda self: self.env.companies)
+    preset_id = fields.Many2one('sale.order.export.preset', required=True, readonly=True, ondelete='restrict')
+    domain = fields.Char(required=True, readonly=True, default='[]')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], required=True, readonly=True, default='queued')
+    row_count = fields.Integer('Rows', readonly=True)
+    file = fields.Binary(attachment=True, readonly=True)
+    file_name = fields.Char(readonly=True)
+    error = fields.Text(readonly=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super().create(vals_list)
+        self.env.ref('sale_order_xlsx_export.ir_cron_process_sale_order_export')._trigger()
+        return jobs
+
+    @api.model
+    def _cron_process(self, limit=5):
+        """ Run the queued exports, each in its own transaction, and notify their users """
+        self._fail_stale_jobs()
+        jobs = self.search([('state', '=', 'queued')], limit=limit, order='id')
+        for job in jobs:
+            job.state = 'running'
+            self._commit()
+            try:
+                job._run()
+                job.state = 'done'
+            except Exception as e:
+                _logger.exception("Sale order export %s failed", job.name)
+                self.env.cr.rollback()
+                job.write({'state': 'failed', 'error': str(e)})
+            job._notify()
+            self._commit()
+        if len(jobs) == limit:
+            self.env.ref('sale_order_xlsx_export.ir_cron_process_sale_order_export')._trigger()
+
+    @api.model
+    def _fail_stale_jobs(self):
+        """ Fail the jobs left running by an interrupted worker """
+        timeout = int(self.env['ir.config_parameter'].sudo().get_param(
+            'sale_order_xlsx_export.job_timeout', DEFAULT_JOB_TIMEOUT))
+        stale = self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(hours=timeout)),
+        ])
+        if stale:
+            stale.write({'state': 'failed', 'error': _("The export was interrupted, please run it again.")})
+            stale._notify()
+            self._commit()
+
+    def _commit(self):
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    def _run(self, batch_size=2000):
+        """ Stream the orders from a server-side cursor into a constant memory XLSX workbook """
+        self.ensure_one()
+        Order = self.env['sale.order'].with_user(self.user_id).with_context(
+            lang=self.user_id.lang, tz=self.user_id.tz, allowed_company_ids=self.company_ids.ids)
+        Order.check_access_rights('read')
+        columns = self.preset_id._get_columns()
+        query = Order._where_calc(safe_eval(self.domain))
+        Order._apply_ir_rules(query, 'read')
+        query.order = '"sale_order"."id"'
+        select, params = query.select(*['"sale_order"."%s"' % field.name for field, _label in columns])
+
+        fd, path = tempfile.mkstemp(suffix='.xlsx', prefix='sale_order_export_')
+        os.close(fd)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+            sheet = workbook.add_worksheet(self.preset_id.name[:31])
+            formats = {
+                'header': workbook.add_format({'bold': True}),
+                'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+                'datetime': workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'}),
+                'number': workbook.add_format({'num_format': '#,##0.00'}),
+            }
+            for col, (_field, label) in enumerate(columns):
+                sheet.write(0, col, label, formats['header'])
+
+            row_count = 0
+            # named cursor: the rows stay on the server, only one batch is held in memory
+            cursor = self.env.cr._cnx.cursor('sale_order_export_%s' % uuid.uuid4().hex)
+            try:
+                cursor.itersize = batch_size
+                cursor.execute(select, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for values in self._convert_rows(Order, columns, rows):
+                        row_count += 1
+                        for col, (value, cell_format) in enumerate(values):
+                            if value is not None:
+                                sheet.write(row_count, col, value, formats.get(cell_format))
+            finally:
+                cursor.close()
+            workbook.close()
+            self._attach_file(path)
+        finally:
+            os.unlink(path)
+        self.write({
+            'file_name': '%s.xlsx' % self.name,
+            'row_count': row_count,
+        })
+
+    def _attach_file(self, path):
+        """ Store the file as the attachment of the file field. With the filestore, the file is copied in place
+        by blocks instead of being loaded and encoded in memory. """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        vals = {
+            'name': 'file',
+            'res_model': self._name,
+            'res_field': 'file',
+            'res_id': self.id,
+            'type': 'binary',
+            'mimetype': XLSX_MIMETYPE,
+        }
+        Attachment.search([
+            ('res_model', '=', self._name), ('res_field', '=', 'file'), ('res_id', '=', self.id),
+        ]).unlink()
+        if Attachment._storage() != 'file':
+            with open(path, 'rb') as f:
+                return Attachment.create(dict(vals, raw=f.read()))
+
+        checksum = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                checksum.update(block)
+        checksum = checksum.hexdigest()
+        fname = '%s/%s' % (checksum[:2], checksum)
+        full_path = Attachment._full_path(fname)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            shutil.copyfile(path, full_path)
+        # removed by the garbage collector if the transaction is rolled back
+        Attachment._mark_for_gc(fname)
+        attachment = Attachment.create(dict(
+            vals, store_fname=fname, checksum=checksum, file_size=os.path.getsize(path)))
+        self.invalidate_recordset(['file'])
+        return attachment
+
+    @api.model
+    def _convert_rows(self, Order, columns, rows):
+        """ Cell values and formats of a batch of rows, many2one names and selection labels resolved per batch """
+        names = {}
+        for index, (field, _label) in enumerate(columns):
+            if field.type == 'many2one':
+                ids = {row[index] for row in rows if row[index]}
+                records = Order.env[field.comodel_name].sudo().browse(ids)
+                names[index] = dict(records.name_get())
+                records.invalidate_recordset()
+            elif field.type == 'selection':
+                names[index] = dict(field._description_selection(Order.env))
+        for row in rows:
+            values = []
+            for index, (field, _label) in enumerate(columns):
+                value = row[index]
+                if value is None or value is False:
+                    values.append((None, None))
+                elif index in names:
+                    values.append((names[index].get(value, value), None))
+                elif field.type == 'datetime':
+                    values.append((fields.Datetime.context_timestamp(Order, value).replace(tzinfo=None), 'datetime'))
+                elif field.type == 'date':
+                    values.append((value, 'date'))
+                elif field.type in ('float', 'monetary'):
+                    values.append((value, 'number'))
+                else:
+                    values.append((value, None))
+            yield values
+
+    def _notify(self):
+        for job in self:
+            if job.state == 'done':
+                message = _("%(name)s is ready: %(count)s orders exported.", name=job.name, count=job.row_count)
+                notification_type = 'success'
+            else:
+                message = _("%(name)s failed: %(error)s", name=job.name, error=job.error)
+                notification_type = 'danger'
+            self.env['bus.bus']._sendone(job.user_id.partner_id, 'simple_notification', {
+                'title': _("Sale Order Export"),
+                'message': message,
+                'type': notification_type,
+                'sticky': True,
+            })
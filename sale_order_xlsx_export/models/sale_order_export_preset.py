@@ -0,0 +1,43 @@
+from odoo import _, api, fields, models
+from odoo.exceptions import ValidationError
+
+
+class SaleOrderExportPreset(models.Model):
+    _name = 'sale.order.export.preset'
+    _description = 'Sale Order Export Preset'
+    _order = 'sequence, id'
+
+    name = fields.Char(required=True, translate=True)
+    sequence = fields.Integer(default=10)
+    column_ids = fields.One2many('sale.order.export.column', 'preset_id', string='Columns', copy=True)
+
+    def _get_columns(self):
+        """ Exported columns, as a list of (field, label) """
+        self.ensure_one()
+        Order = self.env['sale.order']
+        return [(Order._fields[column.field_id.name], column.label or column.field_id.field_description)
+                for column in self.column_ids]
+
+
+class SaleOrderExportColumn(models.Model):
+    _name = 'sale.order.export.column'
+    _description = 'Sale Order Export Column'
+    _order = 'sequence, id'
+
+    preset_id = fields.Many2one('sale.order.export.preset', required=True, ondelete='cascade')
+    sequence = fields.Integer(default=10)
+    field_id = fields.Many2one(
+        'ir.model.fields', required=True, ondelete='cascade',
+        domain="[('model', '=', 'sale.order'), ('store', '=', True), ('ttype', 'not in', ('one2many', 'many2many', 'binary'))]")
+    label = fields.Char(translate=True, help="Column header, the field label by default")
+
+    @api.constrains('field_id')
+    def _check_field_id(self):
+        Order = self.env['sale.order']
+        for column in self:
+            field = Order._fields.get(column.field_id.name)
+            # the rows are read with SQL: only plain stored columns can be exported
+            if column.field_id.model != 'sale.order' or not field or not field.store or not field.column_type \
+                    or field.translate:
+                raise ValidationError(_("%s can not be exported, choose a stored field of the sale order.",
+                                        column.field_id.field_description))
@@ -0,0 +1,89 @@
+import base64
+import io
+import zipfile
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestExportJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Export customer'})
+        cls.product = cls.env['product.product'].create({'name': 'Exported product', 'list_price': 100.0})
+        cls.orders = cls.env['sale.order'].create([{
+            'partner_id': cls.partner.id,
+            'client_order_ref': 'EXPORT-%s' % index,
+            'order_line': [(0, 0, {'product_id': cls.product.id, 'product_uom_qty': index + 1})],
+        } for index in range(3)])
+        get_field = cls.env['ir.model.fields']._get
+        cls.preset = cls.env['sale.order.export.preset'].create({
+            'name': 'Test columns',
+            'column_ids': [(0, 0, {'field_id': get_field('sale.order', name).id})
+                           for name in ('name', 'partner_id', 'state', 'date_order', 'amount_untaxed')],
+        })
+
+    def _create_job(self, domain):
+        return self.env['sale.order.export.job'].create({
+            'name': 'Test export',
+            'preset_id': self.preset.id,
+            'domain': repr(domain),
+        })
+
+    def _read_sheet(self, job):
+        content = base64.b64decode(job.file)
+        # the strings are written inline or in the shared strings depending on the writer mode
+        with zipfile.ZipFile(io.BytesIO(content)) as xlsx:
+            return ''.join(xlsx.read(name).decode() for name in xlsx.namelist()
+                           if name in ('xl/worksheets/sheet1.xml', 'xl/sharedStrings.xml'))
+
+    def test_export(self):
+        job = self._create_job([('id', 'in', self.orders.ids)])
+        self.env['sale.order.export.job']._cron_process()
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.row_count, 3)
+        self.assertEqual(job.file_name, 'Test export.xlsx')
+        sheet = self._read_sheet(job)
+        for order in self.orders:
+            self.assertIn(order.name, sheet)
+        self.assertIn(self.partner.name, sheet)
+        # selection values are exported with their label
+        self.assertIn('Quotation', sheet)
+
+    def test_export_by_batches(self):
+        job = self._create_job([('id', 'in', self.orders.ids)])
+        job._run(batch_size=1)
+        self.assertEqual(job.row_count, 3)
+        self.assertEqual(len(self.env['ir.attachment'].search([
+            ('res_model', '=', job._name), ('res_field', '=', 'file'), ('res_id', '=', job.id)])), 1)
+        job._run(batch_size=2)
+        self.assertEqual(len(self.env['ir.attachment'].search([
+            ('res_model', '=', job._name), ('res_field', '=', 'file'), ('res_id', '=', job.id)])), 1)
+
+    def test_wizard_domain(self):
+        Wizard = self.env['sale.order.export.wizard'].with_context(
+            active_model='sale.order', active_ids=self.orders[:1].ids,
+            active_domain=[('partner_id', '=', self.partner.id)])
+        self.assertEqual(Wizard.new({}).domain, repr([('partner_id', '=', self.partner.id)]))
+        wizard = Wizard.with_context(export_selected=True).create({'preset_id': self.preset.id})
+        self.assertEqual(wizard.domain, repr([('id', 'in', self.orders[:1].ids)]))
+        wizard.action_export()
+        job = self.env['sale.order.export.job'].search([], limit=1)
+        self.assertEqual(job.state, 'queued')
+        self.assertEqual(job.domain, wizard.domain)
+
+    def test_fail_stale_jobs(self):
+        running = self._create_job([])
+        recent = self._create_job([])
+        (running | recent).write({'state': 'running'})
+        running.flush_recordset()
+        self.env.cr.execute(
+            "UPDATE sale_order_export_job SET write_date = write_date - interval '5 hours' WHERE id = %s",
+            [running.id])
+        running.invalidate_recordset()
+        self.env['sale.order.export.job']._fail_stale_jobs()
+        self.assertEqual(running.state, 'failed')
+        self.assertTrue(running.error)
+        self.assertEqual(recent.state, 'running')
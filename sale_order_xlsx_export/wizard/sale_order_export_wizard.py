@@ -0,0 +1,40 @@
+from odoo import _, api, fields, models
+
+
+class SaleOrderExportWizard(models.TransientModel):
+    _name = 'sale.order.export.wizard'
+    _description = 'Sale Order XLSX Export Wizard'
+
+    @api.model
+    def _default_domain(self):
+        context = self.env.context
+        if context.get('active_model') == 'sale.order':
+            if context.get('active_domain') is not None and not context.get('export_selected'):
+                return repr(context['active_domain'])
+            if context.get('active_ids'):
+                return repr([('id', 'in', context['active_ids'])])
+        return '[]'
+
+    preset_id = fields.Many2one(
+        'sale.order.export.preset', string='Columns', required=True,
+        default=lambda self: self.env['sale.order.export.preset'].search([], limit=1))
+    domain = fields.Char(default=_default_domain, required=True)
+
+    def action_export(self):
+        self.ensure_one()
+        job = self.env['sale.order.export.job'].create({
+            'name': '%s %s' % (self.preset_id.name, fields.Datetime.context_timestamp(
+                self, fields.Datetime.now()).strftime('%Y-%m-%d %H:%M')),
+            'preset_id': self.preset_id.id,
+            'domain': self.domain,
+        })
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Sale Order Export"),
+                'message': _("%s is being prepared, you will be notified when the file is ready.", job.name),
+                'type': 'info',
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
@@ -1,13 +1,15 @@
 {
     'name': 'Status Full Payment Invoice di Sales Order',
-    'version': '1.0',
+    'version': '1.2',
     'category': '',
     'summary': '',
     'author': 'Rizky',
     'depends': ['sale','account'],
     'license': 'LGPL-3',
     'data': [
+        'data/ir_cron.xml',
         'views/sale_order_views.xml',
+        'views/sale_order_payment_dashboard_views.xml',
     ],
     'installable': True,
     'application': False,
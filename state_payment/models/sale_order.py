@@ -1,4 +1,44 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+
+PAYMENT_STATUS = [
+    ('no_invoice', 'Not Invoiced'),
+    ('not_paid', 'Not Paid'),
+    ('partial_payment', 'Partial Payment'),
+    ('full_payment', 'Full Payment'),
+]
+
+PAYMENT_AGING = [
+    ('not_due', 'Not Due'),
+    ('1_30', '1-30 Days'),
+    ('31_60', '31-60 Days'),
+    ('61_90', '61-90 Days'),
+    ('over_90', 'Over 90 Days'),
+]
+
+# bucket dari jumlah hari lewat jatuh tempo, sama dengan _get_payment_aging
+PAYMENT_AGING_SQL = """
+    CASE WHEN payment_due_date IS NULL THEN NULL
+         WHEN payment_due_date >= %(today)s THEN 'not_due'
+         WHEN %(today)s - payment_due_date <= 30 THEN '1_30'
+         WHEN %(today)s - payment_due_date <= 60 THEN '31_60'
+         WHEN %(today)s - payment_due_date <= 90 THEN '61_90'
+         ELSE 'over_90' END
+"""
+
+
+def _get_payment_aging(due_date, today):
+    if not due_date:
+        return False
+    days = (today - due_date).days
+    if days <= 0:
+        return 'not_due'
+    if days <= 30:
+        return '1_30'
+    if days <= 60:
+        return '31_60'
+    if days <= 90:
+        return '61_90'
+    return 'over_90'
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -8,20 +48,107 @@ class SaleOrder(models.Model):
         ('full_payment', 'Full Payment'),
         ('partial_payment', 'Partial Payment')
     ])
-    
-    @api.depends('state', 'order_line.invoice_status', 'invoice_ids.payment_state', 'invoice_ids.state')
+
+    # Agregat pembayaran invoice, disimpan dan hanya dihitung ulang untuk order yang invoicenya berubah
+    payment_amount_invoiced = fields.Monetary(
+        string='Invoiced Amount', compute='_compute_payment_amounts', store=True, currency_field='currency_id')
+    payment_amount_paid = fields.Monetary(
+        string='Paid Amount', compute='_compute_payment_amounts', store=True, currency_field='currency_id')
+    payment_amount_residual = fields.Monetary(
+        string='Amount Due', compute='_compute_payment_amounts', store=True, currency_field='currency_id')
+
+    # Status pembayaran terpisah dari invoice_status, untuk filter dan dashboard penagihan
+    payment_status = fields.Selection(
+        PAYMENT_STATUS, string='Payment Status', compute='_compute_payment_amounts', store=True, index=True)
+    payment_due_date = fields.Date(
+        string='Oldest Due Date', compute='_compute_payment_amounts', store=True, index=True,
+        help="Due date of the oldest open invoice of the order")
+    # diperbarui setiap hari oleh cron karena bergantung pada tanggal hari ini
+    payment_aging = fields.Selection(
+        PAYMENT_AGING, string='Aging', compute='_compute_payment_amounts', store=True, index=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'sale_order_payment_dashboard_index',
+                           self._table, ['company_id', 'payment_status', 'payment_aging'])
+
+    @api.depends('order_line.invoice_lines.move_id.state',
+                 'order_line.invoice_lines.move_id.payment_state',
+                 'order_line.invoice_lines.move_id.amount_total_in_currency_signed',
+                 'order_line.invoice_lines.move_id.amount_residual',
+                 'order_line.invoice_lines.move_id.invoice_date_due')
+    def _compute_payment_amounts(self):
+        amounts = self._read_payment_amounts()
+        today = fields.Date.context_today(self)
+        for order in self:
+            invoiced, residual, due_date = amounts.get(order.id, (0.0, 0.0, None))
+            order.payment_amount_invoiced = invoiced
+            order.payment_amount_residual = residual
+            order.payment_amount_paid = invoiced - residual
+            order.payment_due_date = due_date
+            order.payment_aging = _get_payment_aging(due_date, today)
+            currency = order.currency_id
+            if currency.is_zero(invoiced):
+                order.payment_status = 'no_invoice'
+            elif currency.is_zero(residual):
+                order.payment_status = 'full_payment'
+            elif currency.compare_amounts(invoiced - residual, 0) > 0:
+                order.payment_status = 'partial_payment'
+            else:
+                order.payment_status = 'not_paid'
+
+    def _read_payment_amounts(self):
+        """ Jumlah invoice dan sisa tagihan per order, satu query untuk semua order
+
+        :return: dict {order_id: (amount_invoiced, amount_residual, oldest_due_date)} dalam mata uang
+                 invoice, credit note mengurangi
+        """
+        order_ids = tuple(order_id for order_id in self._ids if isinstance(order_id, int))
+        if not order_ids:
+            return {}
+        self.env['sale.order.line'].flush_model(['order_id', 'invoice_lines'])
+        self.env['account.move.line'].flush_model(['move_id'])
+        self.env['account.move'].flush_model([
+            'move_type', 'state', 'amount_total_in_currency_signed', 'amount_residual', 'invoice_date_due'])
+        self.env.cr.execute("""
+            SELECT inv.order_id,
+                   sum(inv.amount_total),
+                   sum(CASE WHEN inv.state = 'posted' THEN inv.amount_residual ELSE abs(inv.amount_total) END
+                       * CASE WHEN inv.move_type = 'out_refund' THEN -1 ELSE 1 END),
+                   min(CASE WHEN inv.state = 'posted' AND inv.move_type = 'out_invoice' AND inv.amount_residual > 0
+                            THEN inv.invoice_date_due END)
+              FROM (SELECT DISTINCT sol.order_id, move.id, move.move_type, move.state, move.invoice_date_due,
+                           coalesce(move.amount_total_in_currency_signed, 0) AS amount_total,
+                           coalesce(move.amount_residual, 0) AS amount_residual
+                      FROM sale_order_line sol
+                      JOIN sale_order_line_invoice_rel rel ON rel.order_line_id = sol.id
+                      JOIN account_move_line aml ON aml.id = rel.invoice_line_id
+                      JOIN account_move move ON move.id = aml.move_id
+                     WHERE sol.order_id IN %s
+                       AND move.state != 'cancel'
+                       AND move.move_type IN ('out_invoice', 'out_refund')) inv
+             GROUP BY inv.order_id
+        """, [order_ids])
+        return {
+            order_id: (invoiced or 0.0, residual or 0.0, due_date)
+            for order_id, invoiced, residual, due_date in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _cron_update_payment_aging(self):
+        """ Geser bucket aging order yang masih punya tagihan, satu UPDATE untuk semua order """
+        self.flush_model(['payment_due_date', 'payment_aging'])
+        self.env.cr.execute(
+            "UPDATE sale_order SET payment_aging = {aging} "
+            "WHERE payment_due_date IS NOT NULL AND payment_aging IS DISTINCT FROM {aging}".format(
+                aging=PAYMENT_AGING_SQL),
+            {'today': fields.Date.context_today(self)})
+        self.invalidate_model(['payment_aging'])
+
+    @api.depends('state', 'order_line.invoice_status', 'payment_status')
     def _get_invoice_status(self):
         super()._get_invoice_status()  # Panggil method asli dulu
         
         for order in self:
-            invoices = order.invoice_ids.filtered(lambda inv: inv.state != 'cancel')
-            if not invoices:
-                continue
-                
-            # Cek status pembayaran invoice
-            payment_states = invoices.mapped('payment_state')
-            
-            if all(state == 'in_payment' for state in payment_states):
-                order.invoice_status = 'full_payment'
-            elif any(state == 'partial' for state in payment_states):
-                order.invoice_status = 'partial_payment'
\ No newline at end of file
+            # Cek status pembayaran yang tersimpan
+            if order.payment_status in ('full_payment', 'partial_payment'):
+                order.invoice_status = order.payment_status
@@ -0,0 +1,2 @@
+from . import test_payment_amounts
+from . import test_payment_status
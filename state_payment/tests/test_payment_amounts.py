@@ -0,0 +1,59 @@
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentAmounts(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.order = cls.env['sale.order'].create({
+            'partner_id': cls.partner_a.id,
+            'order_line': [(0, 0, {
+                'product_id': cls.product_a.id,
+                'product_uom_qty': 1.0,
+                'price_unit': 1000.0,
+                'tax_id': [(6, 0, [])],
+            })],
+        })
+        cls.order.action_confirm()
+
+    def _invoice(self, invoice_date='2019-01-01'):
+        invoice = self.order._create_invoices()
+        invoice.invoice_date = invoice_date
+        invoice.action_post()
+        return invoice
+
+    def _pay(self, invoice, amount):
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids,
+        ).create({'amount': amount})._create_payments()
+
+    def test_payment_amounts(self):
+        order = self.order
+        self.assertAlmostEqual(order.payment_amount_invoiced, 0.0)
+
+        invoice = self._invoice()
+        self.assertAlmostEqual(order.payment_amount_invoiced, 1000.0)
+        self.assertAlmostEqual(order.payment_amount_residual, 1000.0)
+        self.assertAlmostEqual(order.payment_amount_paid, 0.0)
+
+        self._pay(invoice, 400.0)
+        self.assertAlmostEqual(order.payment_amount_paid, 400.0)
+        self.assertAlmostEqual(order.payment_amount_residual, 600.0)
+        self.assertEqual(order.invoice_status, 'partial_payment')
+
+        self._pay(invoice, 600.0)
+        self.assertAlmostEqual(order.payment_amount_paid, 1000.0)
+        self.assertAlmostEqual(order.payment_amount_residual, 0.0)
+        self.assertEqual(order.invoice_status, 'full_payment')
+
+    def test_credit_note(self):
+        invoice = self._invoice()
+        reversal = invoice._reverse_moves()
+        self.assertAlmostEqual(self.order.payment_amount_invoiced, 0.0)
+        reversal.action_post()
+        self.assertAlmostEqual(self.order.payment_amount_invoiced, 0.0)
+        self.assertAlmostEqual(self.order.payment_amount_residual, 0.0)
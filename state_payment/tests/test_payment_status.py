@@ -0,0 +1,59 @@
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentStatus(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.order = cls.env['sale.order'].create({
+            'partner_id': cls.partner_a.id,
+            'order_line': [(0, 0, {
+                'product_id': cls.product_a.id,
+                'product_uom_qty': 1.0,
+                'price_unit': 1000.0,
+                'tax_id': [(6, 0, [])],
+            })],
+        })
+        cls.order.action_confirm()
+
+    def _invoice(self, invoice_date='2019-01-01'):
+        invoice = self.order._create_invoices()
+        invoice.invoice_date = invoice_date
+        invoice.action_post()
+        return invoice
+
+    def _pay(self, invoice, amount):
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids,
+        ).create({'amount': amount})._create_payments()
+
+    def test_payment_status(self):
+        order = self.order
+        self.assertEqual(order.payment_status, 'no_invoice')
+        self.assertFalse(order.payment_aging)
+
+        invoice = self._invoice()
+        self.assertEqual(order.payment_status, 'not_paid')
+        self.assertEqual(order.payment_due_date, invoice.invoice_date_due)
+        self.assertEqual(order.payment_aging, 'over_90')
+
+        self._pay(invoice, 400.0)
+        self.assertEqual(order.payment_status, 'partial_payment')
+        self.assertEqual(order.payment_aging, 'over_90')
+
+        self._pay(invoice, 600.0)
+        self.assertEqual(order.payment_status, 'full_payment')
+        self.assertFalse(order.payment_due_date)
+        self.assertFalse(order.payment_aging)
+
+    def test_cron_update_payment_aging(self):
+        self._invoice()
+        self.order.flush_recordset()
+        self.env.cr.execute("UPDATE sale_order SET payment_aging = 'not_due' WHERE id = %s", [self.order.id])
+        self.order.invalidate_recordset(['payment_aging'])
+        self.env['sale.order']._cron_update_payment_aging()
+        self.assertEqual(self.order.payment_aging, 'over_90')
@@ -1,4 +1,4 @@
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
 
 
 class ResCompany(models.Model):
@@ -9,6 +9,24 @@ class ResCompany(models.Model):
     sale_order_note = fields.Text(
         string='Default Term(s) and Condition(s)', translate=True)
 
+    @api.model
+    @tools.ormcache('company_id', 'lang')
+    def _get_sale_order_note(self, company_id, lang):
+        """Default terms of the company in the given language, cached until the note changes."""
+        return self.sudo().browse(company_id).with_context(lang=lang).sale_order_note or ''
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'sale_order_note' in vals:
+            self.clear_caches()
+        return res
+
+    def _update_field_translations(self, field_name, translations, digest=None):
+        res = super()._update_field_translations(field_name, translations, digest)
+        if field_name == 'sale_order_note':
+            self.clear_caches()
+        return res
+
 
 class ResConfigSettings(models.TransientModel):
     _inherit = "res.config.settings"
@@ -26,10 +44,34 @@ class SaleOrder(models.Model):
 
     @api.model
     def _default_note(self):
-        return self.env.company.sale_order_note or ''
+        return self.env['res.company']._get_sale_order_note(self.env.company.id, self.env.lang)
 
     note = fields.Text('Term(s) and condition(s)', default=_default_note)
 
+    @api.model
+    def _use_sale_order_note(self):
+        # get_param is cached, and setting a parameter clears the caches
+        return self.env['ir.config_parameter'].sudo().get_param('sale_order_terms_knk.use_sale_order_note')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """
+        Fill the terms of the orders created without note (imports, RPC) in the
+        language of their customer, as the partner onchange does, from the cache.
+        """
+        vals_list = [dict(vals) for vals in vals_list]
+        missing = [vals for vals in vals_list if 'note' not in vals and vals.get('partner_id')]
+        if missing and self._use_sale_order_note():
+            partners = self.env['res.partner'].browse({vals['partner_id'] for vals in missing})
+            lang_by_partner = {partner.id: partner.lang for partner in partners}
+            get_note = self.env['res.company']._get_sale_order_note
+            for vals in missing:
+                company_id = vals.get('company_id') or self.env.company.id
+                note = get_note(company_id, lang_by_partner[vals['partner_id']] or self.env.lang)
+                if note:
+                    vals['note'] = note
+        return super().create(vals_list)
+
     @api.onchange('partner_id')
     def onchange_partner_id(self):
         """
@@ -57,8 +99,11 @@ class SaleOrder(models.Model):
             'partner_shipping_id': addr['delivery'],
             'user_id': partner_user.id or self.env.uid
         }
-        if self.env['ir.config_parameter'].sudo().get_param('sale_order_terms_knk.use_sale_order_note') and self.env.company.sale_order_note:
-            values['note'] = self.with_context(lang=self.partner_id.lang).env.company.sale_order_note
+        if self._use_sale_order_note():
+            note = self.env['res.company']._get_sale_order_note(
+                self.env.company.id, self.partner_id.lang or self.env.lang)
+            if note:
+                values['note'] = note
 
         # Use team of salesman if any otherwise leave as-is
         values['team_id'] = partner_user.team_id.id if partner_user and partner_user.team_id else self.team_id
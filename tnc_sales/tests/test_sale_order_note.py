@@ -0,0 +1,42 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestSaleOrderNote(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['res.lang']._activate_lang('fr_FR')
+        cls.company = cls.env.company
+        cls.company.write({'use_sale_order_note': True, 'sale_order_note': 'Terms'})
+        cls.company.with_context(lang='fr_FR').sale_order_note = 'Conditions'
+        cls.other_company = cls.env['res.company'].create({'name': 'Other terms company'})
+        cls.other_company.sale_order_note = 'Other terms'
+        cls.partner_fr = cls.env['res.partner'].create({'name': 'Client', 'lang': 'fr_FR'})
+        cls.env['ir.config_parameter'].sudo().set_param('sale_order_terms_knk.use_sale_order_note', True)
+
+    def test_note_by_company_and_language(self):
+        get_note = self.env['res.company']._get_sale_order_note
+        self.assertEqual(get_note(self.company.id, 'en_US'), 'Terms')
+        self.assertEqual(get_note(self.company.id, 'fr_FR'), 'Conditions')
+        self.assertEqual(get_note(self.other_company.id, 'en_US'), 'Other terms')
+
+    def test_note_change_clears_cache(self):
+        get_note = self.env['res.company']._get_sale_order_note
+        self.assertEqual(get_note(self.company.id, 'en_US'), 'Terms')
+        self.company.sale_order_note = 'New terms'
+        self.assertEqual(get_note(self.company.id, 'en_US'), 'New terms')
+        self.company._update_field_translations('sale_order_note', {'fr_FR': 'Nouvelles conditions'})
+        self.assertEqual(get_note(self.company.id, 'fr_FR'), 'Nouvelles conditions')
+
+    def test_create_in_partner_language(self):
+        order = self.env['sale.order'].create({'partner_id': self.partner_fr.id})
+        self.assertEqual(order.note, 'Conditions')
+        order = self.env['sale.order'].create({'partner_id': self.partner_fr.id, 'note': 'Specific'})
+        self.assertEqual(order.note, 'Specific')
+        self.env.user.company_ids |= self.other_company
+        order = self.env['sale.order'].with_company(self.other_company).create({
+            'partner_id': self.partner_fr.id,
+        })
+        self.assertEqual(order.note, 'Other terms')